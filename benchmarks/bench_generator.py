@@ -0,0 +1,48 @@
+# Copyright 2021 Paolo Smiraglia <paolo.smiraglia@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import itertools
+
+import pytest
+from certs import CERT_OPTS
+
+from spid_compliant_certificates.generator import generate
+
+KEY_SIZES = [2048, 3072, 4096]
+
+_counter = itertools.count()
+
+
+@pytest.mark.parametrize('key_size', KEY_SIZES)
+def bench_generate(benchmark, tmp_path, key_size):
+    # private sector: no network access required
+    def _generate():
+        n = next(_counter)
+        crypto_opts = {
+            'crt_out': tmp_path / f'crt-{n}.pem',
+            'csr_out': tmp_path / f'csr-{n}.pem',
+            'key_out': tmp_path / f'key-{n}.pem',
+            'key_size': key_size,
+            'md_alg': 'sha256',
+        }
+        generate(CERT_OPTS['private'], crypto_opts)
+
+    # RSA key generation is slow and has a high variance
+    benchmark.pedantic(_generate, rounds=5, iterations=1, warmup_rounds=1)
@@ -0,0 +1,60 @@
+# Copyright 2021 Paolo Smiraglia <paolo.smiraglia@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import pytest
+
+from spid_compliant_certificates.validator.cache import ReportCache
+from spid_compliant_certificates.validator.report import ReportSerializer
+from spid_compliant_certificates.validator.utils import iter_der, pem_to_der
+from spid_compliant_certificates.validator.validate import validate
+
+SECTORS = ['private', 'public']
+FORMATS = ['json', 'jsonl', 'txt', 'xml', 'yaml']
+
+
+def bench_pem_to_der(benchmark, crt_files):
+    der, _ = benchmark(pem_to_der, crt_files['private'])
+    assert der
+
+
+def bench_iter_der_bundle(benchmark, bundle_file):
+    ders = benchmark(lambda: list(iter_der(bundle_file)))
+    assert len(ders) == 100
+
+
+@pytest.mark.parametrize('sector', SECTORS)
+def bench_validate(benchmark, crt_files, sector):
+    rep = benchmark(validate, crt_files[sector], sector)
+    assert rep.is_success()
+
+
+@pytest.mark.parametrize('sector', SECTORS)
+def bench_validate_cached(benchmark, crt_files, sector):
+    cache = ReportCache()
+    validate(crt_files[sector], sector, cache)
+    rep = benchmark(validate, crt_files[sector], sector, cache)
+    assert rep.is_success()
+
+
+@pytest.mark.parametrize('format', FORMATS)
+def bench_serialize(benchmark, crt_files, format):
+    rep = validate(crt_files['public'], 'public')
+    out = benchmark(ReportSerializer().serialize, rep, format)
+    assert out
@@ -0,0 +1,37 @@
+# Copyright 2021 Paolo Smiraglia <paolo.smiraglia@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import pathlib
+
+import pytest
+from certs import CERT_OPTS, self_signed
+
+
+@pytest.fixture(scope='session')
+def crt_files(tmp_path_factory) -> dict:
+    tmp = tmp_path_factory.mktemp('certs')
+    return {sector: self_signed(tmp, sector) for sector in CERT_OPTS}
+
+
+@pytest.fixture(scope='session')
+def bundle_file(tmp_path_factory, crt_files) -> pathlib.Path:
+    tmp = tmp_path_factory.mktemp('bundle')
+    bundle = tmp / 'bundle.pem'
+    bundle.write_bytes(crt_files['private'].read_bytes() * 100)
+    return bundle
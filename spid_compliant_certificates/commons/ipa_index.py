@@ -0,0 +1,172 @@
+# Copyright 2021 Paolo Smiraglia <paolo.smiraglia@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import csv
+import hashlib
+import json
+import os
+import pathlib
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# column names used by the different IPA open-data dumps
+CODE_FIELDS = ['codice_ipa', 'cod_amm', 'codente', 'codice_ente']
+NAME_FIELDS = ['denominazione_ente', 'des_amm', 'denominazione']
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS enti (
+    code TEXT PRIMARY KEY,
+    name TEXT
+) WITHOUT ROWID
+'''
+
+
+def _pick(row: Dict, fields: List[str]) -> Optional[str]:
+    keys = {k.lower(): k for k in row}
+    for f in fields:
+        if f in keys and row[keys[f]]:
+            return str(row[keys[f]]).strip()
+    return None
+
+
+def _read_json(dump: pathlib.Path) -> List[Dict]:
+    with open(dump) as fp:
+        data = json.load(fp)
+    # CKAN datastore exports wrap the records
+    if isinstance(data, dict):
+        data = data.get('result', data)
+        fields = [f['id'] for f in data.get('fields', [])]
+        data = data.get('records', [])
+        if data and fields and isinstance(data[0], list):
+            data = [dict(zip(fields, r)) for r in data]
+    if not isinstance(data, list):
+        emsg = f'Dump {dump} must contain a list of records'
+        raise ValueError(emsg)
+    return data
+
+
+def _iter_entries(dump: pathlib.Path) -> Iterator[Tuple[str, str]]:
+    suffix = dump.suffix.lower()
+    if suffix == '.csv':
+        with open(dump, newline='', encoding='utf-8-sig') as fp:
+            sample = fp.read(4096)
+            fp.seek(0)
+            dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+            rows = csv.DictReader(fp, dialect=dialect)
+            for row in rows:
+                code = _pick(row, CODE_FIELDS)
+                if code:
+                    yield code, _pick(row, NAME_FIELDS)
+    elif suffix == '.json':
+        for row in _read_json(dump):
+            code = _pick(row, CODE_FIELDS)
+            if code:
+                yield code, _pick(row, NAME_FIELDS)
+    else:
+        emsg = f'Dump {dump} must be a CSV or a JSON file'
+        raise ValueError(emsg)
+
+
+def import_dump(dump: pathlib.Path, index_file: pathlib.Path) -> int:
+    import sqlite3
+
+    dump = pathlib.Path(dump)
+    index_file = pathlib.Path(index_file)
+
+    # built aside and swapped in, readers never see a partial index
+    tmp = index_file.with_name(f'.{index_file.name}.{os.getpid()}')
+    if tmp.exists():
+        tmp.unlink()
+    conn = sqlite3.connect(str(tmp))
+    try:
+        conn.execute(SCHEMA)
+        with conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO enti (code, name) VALUES (?, ?)',
+                _iter_entries(dump)
+            )
+        count = conn.execute('SELECT COUNT(*) FROM enti').fetchone()[0]
+    except BaseException:
+        # a dump that fails halfway leaves nothing behind
+        conn.close()
+        tmp.unlink()
+        raise
+    conn.close()
+
+    if not count:
+        tmp.unlink()
+        emsg = f'No IPA code was found in {dump}'
+        raise ValueError(emsg)
+
+    os.replace(tmp, index_file)
+    return count
+
+
+class IPAIndex(object):
+    # read-only lookups of IPA codes in an index built by import_dump()
+    def __init__(self, index_file: pathlib.Path):
+        self.index_file = pathlib.Path(index_file)
+        if not self.index_file.is_file():
+            emsg = f'IPA index {self.index_file} not found'
+            raise ValueError(emsg)
+        # identifies this build of the index, a new dump gets a new one
+        st = self.index_file.stat()
+        ident = f'{self.index_file.resolve()}:{st.st_ino}:{st.st_mtime_ns}:{st.st_size}'  # noqa
+        self.version = hashlib.sha256(ident.encode()).hexdigest()[:16]
+        self._conn = None
+        self._pid = None
+
+    def __getstate__(self) -> Dict:
+        return {'index_file': self.index_file}
+
+    def __setstate__(self, state: Dict) -> None:
+        self.__init__(**state)
+
+    def _connect(self):
+        # connections must not be shared with forked processes
+        if self._conn is None or self._pid != os.getpid():
+            import sqlite3
+
+            uri = f'{self.index_file.absolute().as_uri()}?mode=ro'
+            self._conn = sqlite3.connect(uri, uri=True,
+                                         check_same_thread=False)
+            self._pid = os.getpid()
+        return self._conn
+
+    def get(self, ipa_code: str) -> Optional[str]:
+        row = self._connect().execute(
+            'SELECT name FROM enti WHERE code = ?', (ipa_code,)
+        ).fetchone()
+        return None if row is None else (row[0] or '')
+
+    def exists(self, ipa_code: str) -> bool:
+        return self.get(ipa_code) is not None
+
+    def __contains__(self, ipa_code: str) -> bool:
+        return self.exists(ipa_code)
+
+    def __len__(self) -> int:
+        return self._connect().execute(
+            'SELECT COUNT(*) FROM enti'
+        ).fetchone()[0]
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
@@ -18,49 +18,129 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import atexit
+import copy
+import json
 import logging
+import logging.handlers
 import platform
+import queue
+import sys
+from typing import IO, Optional
 
 RED = '\x1b[31m'
 GREEN = '\x1b[32m'
 YELLOW = '\x1b[33m'
 CYAN = '\x1b[36m'
+MAGENTA = '\x1b[35m'
 
+# between INFO and WARNING: what is left in quiet mode
+SUMMARY = 25
+logging.addLevelName(SUMMARY, 'SUMMARY')
 
-class ColourFilter(logging.Filter):
-    def filter(self, record: logging.LogRecord) -> bool:
-        levelno = record.levelno
-        if levelno >= logging.CRITICAL:
-            record.color = RED
-        elif levelno >= logging.ERROR:
-            record.color = RED
-        elif levelno >= logging.WARNING:
-            record.color = YELLOW
-        elif levelno >= logging.INFO:
-            record.color = GREEN
-        elif levelno >= logging.DEBUG:
-            record.color = CYAN
-        else:
-            record.color = '\x1b[0m'
-        return True
+
+def _colour(levelno: int) -> str:
+    if levelno >= logging.CRITICAL:
+        return RED
+    elif levelno >= logging.ERROR:
+        return RED
+    elif levelno >= logging.WARNING:
+        return YELLOW
+    elif levelno >= SUMMARY:
+        return MAGENTA
+    elif levelno >= logging.INFO:
+        return GREEN
+    elif levelno >= logging.DEBUG:
+        return CYAN
+    else:
+        return '\x1b[0m'
+
+
+class ColourFormatter(logging.Formatter):
+    # the colour is computed only for the records actually emitted
+    def format(self, record: logging.LogRecord) -> str:
+        record.color = _colour(record.levelno)
+        return super().format(record)
+
+
+class JsonFormatter(logging.Formatter):
+    # one JSON object per line
+    def format(self, record: logging.LogRecord) -> str:
+        d = {
+            'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname.lower(),
+            'logger': record.name,
+            'message': record.getMessage().strip(),
+        }
+        # structured fields given with extra={...}
+        for k in ['target', 'result', 'sector', 'check']:
+            if hasattr(record, k):
+                d[k] = getattr(record, k)
+        if record.exc_info:
+            d['exc'] = self.formatException(record.exc_info)
+        return json.dumps(d, default=str)
 
 
 def _c(f: str) -> str:
     return '%(color)s' + f + '\x1b[0m'
 
 
-_sh = logging.StreamHandler()
-_sh.setLevel(logging.DEBUG)
-
-if platform.system() == 'Windows':
-    fmt = '[%(levelname)1.1s] %(message)s'
-    _sh.setFormatter(logging.Formatter(fmt))
-else:
+def _text_formatter() -> logging.Formatter:
+    if platform.system() == 'Windows':
+        fmt = '[%(levelname)1.1s] %(message)s'
+        return logging.Formatter(fmt)
     levelname = _c('%(levelname)1.1s')
     fmt = '[' + levelname + '] %(message)s'
-    _sh.setFormatter(logging.Formatter(fmt))
-    _sh.addFilter(ColourFilter())
+    return ColourFormatter(fmt)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    # the stdlib prepare() formats the record in the logging thread, here
+    # the record is only copied and the listener's handler formats it
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return copy.copy(record)
+
+
+# the package logs under its own name, applications decide where the
+# records go (see setup() for the command line)
+LOG = logging.getLogger('spid_compliant_certificates')
+LOG.addHandler(logging.NullHandler())
+
+_listener = None
+
+
+def setup(level: int = logging.DEBUG, json_lines: bool = False,
+          stream: Optional[IO] = None) -> None:
+    # the caller only enqueues the record, formatting and writing happen
+    # in the listener thread
+    global _listener
+    shutdown()
+
+    handler = logging.StreamHandler(stream or sys.stderr)
+    if json_lines:
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(_text_formatter())
+
+    q = queue.SimpleQueue()
+    for h in [h for h in LOG.handlers
+              if not isinstance(h, logging.NullHandler)]:
+        LOG.removeHandler(h)
+    LOG.addHandler(_QueueHandler(q))
+    LOG.setLevel(level)
+    # records are handled here, not by the root logger
+    LOG.propagate = False
+
+    _listener = logging.handlers.QueueListener(q, handler)
+    _listener.start()
+
+
+def shutdown() -> None:
+    # flushes the pending records
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
 
-LOG = logging.getLogger()
-LOG.setLevel(logging.DEBUG)
-LOG.addHandler(_sh)
+atexit.register(shutdown)
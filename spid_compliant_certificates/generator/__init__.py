@@ -18,6 +18,10 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-from spid_compliant_certificates.generator.generate import generate
+from spid_compliant_certificates.generator.generate import (
+    generate,
+    generate_bytes,
+    generate_objects,
+)
 
-__all__ = ['generate']
+__all__ = ['generate', 'generate_bytes', 'generate_objects']
@@ -0,0 +1,88 @@
+# Copyright 2021 Paolo Smiraglia <paolo.smiraglia@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import asyncio
+from concurrent.futures import Executor
+from functools import partial
+from typing import Dict, Optional, Union
+
+from spid_compliant_certificates.commons.ipa_index import IPAIndex
+from spid_compliant_certificates.generator.generate import (
+    GeneratedBytes,
+    _build,
+    _build_bytes,
+    _encode,
+    validate_arguments,
+)
+from spid_compliant_certificates.generator.ipa import IPAClient
+from spid_compliant_certificates.generator.keypool import KeyPool
+
+
+class AsyncGenerator(object):
+    # key generation runs on `executor` (the loop default one if None,
+    # a ProcessPoolExecutor scales with the cores), at most
+    # `max_concurrency` generations are in flight at the same time
+    def __init__(self, executor: Optional[Executor] = None,
+                 max_concurrency: int = 16,
+                 ipa: Union[IPAClient, IPAIndex, None] = None,
+                 pool: Optional[KeyPool] = None):
+        self.executor = executor
+        self.max_concurrency = max_concurrency
+        self.ipa = ipa
+        self.pool = pool
+        self._semaphore = None
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        # created lazily, it must belong to the running loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def generate(self, cert_opts: Dict,
+                       crypto_opts: Optional[Dict] = None,
+                       encoding: str = 'PEM') -> GeneratedBytes:
+        loop = asyncio.get_running_loop()
+        async with self.semaphore:
+            # the IPA lookup is blocking I/O, it goes to the default
+            # thread pool and never to a process pool
+            await loop.run_in_executor(
+                None, validate_arguments, cert_opts, self.ipa
+            )
+
+            # a cancellation while waiting drops the job if it has not
+            # started yet, a running key generation is left to complete
+            if self.pool is not None:
+                # the key pool lives in this process, build here
+                fn = partial(_build, cert_opts, crypto_opts, self.pool)
+                g = await loop.run_in_executor(None, fn)
+                return _encode(g, encoding)
+            return await loop.run_in_executor(
+                self.executor, _build_bytes, cert_opts, crypto_opts, encoding
+            )
+
+
+async def agenerate(cert_opts: Dict, crypto_opts: Optional[Dict] = None,
+                    executor: Optional[Executor] = None,
+                    ipa: Union[IPAClient, IPAIndex, None] = None,
+                    encoding: str = 'PEM') -> GeneratedBytes:
+    # no concurrency limit, use AsyncGenerator to share one
+    g = AsyncGenerator(executor, ipa=ipa)
+    return await g.generate(cert_opts, crypto_opts, encoding)
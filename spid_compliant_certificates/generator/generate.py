@@ -19,24 +19,42 @@
 # SOFTWARE.
 
 import datetime
-import json
 import pathlib
 import re
-from typing import Dict, List, Tuple
+from typing import (
+    TYPE_CHECKING,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
 
-import requests
 from cryptography import x509
 from cryptography.hazmat.primitives import hashes, serialization
 from cryptography.hazmat.primitives.asymmetric import rsa
 from cryptography.x509.oid import NameOID
 
 from spid_compliant_certificates.commons import logger
+from spid_compliant_certificates.commons.ipa_index import IPAIndex
+from spid_compliant_certificates.generator.ipa import (
+    SEARCH_UI,
+    IPAClient,
+    get_client,
+)
+
+if TYPE_CHECKING:
+    # the key pool generates its keys with _new_private_key()
+    from spid_compliant_certificates.generator.keypool import KeyPool
 
 MD_ALGS = {
     'sha256': hashes.SHA256(),
     'sha512': hashes.SHA512(),
 }
 
+KEY_SIZES = (2048, 3072, 4096)
+
 LOG = logger.LOG
 
 
@@ -49,7 +67,8 @@ def _validate_private_arguments(cert_opts: Dict) -> None:
         raise ValueError(emsg)
 
 
-def _validate_public_arguments(cert_opts: Dict) -> None:
+def _validate_public_arguments(cert_opts: Dict,
+                               ipa: Union[IPAClient, IPAIndex, None] = None) -> None:  # noqa
     # validate organizationIdentifier
     pattern = r'^PA:IT-\S{1,11}$'
     org_id = cert_opts['org_id']
@@ -59,84 +78,61 @@ def _validate_public_arguments(cert_opts: Dict) -> None:
 
     # check if the ipa code is valid
     ipa_code = org_id[6:]
+    if ipa is None:
+        ipa = get_client()
 
-    search_api = 'https://indicepa.gov.it/PortaleServices/api/ente/ricerca'
-    query = json.dumps({
-        'area': None,
-        'codEnte': ipa_code,
-        'codiceCategoria': None,
-        'codiceFiscaleRicerca': None,
-        'denominazione': None,
-        'idTipoServizioDigitale': None,
-        'lingueMinoritarie': None,
-        'paginazione': {
-            'campoOrdinamento': 'idEnte',
-            'numTotalePagine': None,
-            'numeroRigheTotali': None,
-            'paginaCorrente': None,
-            'paginaRichiesta': 1,
-            'righePerPagina': None,
-            'tipoOrdinamento': 'asc',
-        }
-    }, separators=(',', ':'))
-    headers = {
-        'content-type': 'application/json',
-    }
-
-    r = requests.post(search_api, headers=headers, data=query)
-    res = json.loads(r.text)
-
-    if not res['risposta']['listaResponse']:
-        emsg = [
-            f'The IPA code ({ipa_code}) refers to something that does not exist.',  # noqa
-            'Check it by yourself at https://indicepa.gov.it/ipa-portale/consultazione/indirizzo-sede/ricerca-ente'  # noqa
-        ]
-        raise ValueError(' '.join(emsg))
-
-    ipa_code_is_valid = False
-    for e in res['risposta']['listaResponse']:
-        if e['codEnte'] == ipa_code:
-            ipa_code_is_valid = True
-            break
-
-    if not ipa_code_is_valid:
+    if not ipa.exists(ipa_code):
         emsg = [
             f'The IPA code ({ipa_code}) refers to something that does not exist.',  # noqa
-            'Check it by yourself at https://indicepa.gov.it/ipa-portale/consultazione/indirizzo-sede/ricerca-ente'  # noqa
+            f'Check it by yourself at {SEARCH_UI}'
         ]
         raise ValueError(' '.join(emsg))
 
 
-def validate_arguments(cert_opts: Dict) -> None:
+def validate_arguments(cert_opts: Dict,
+                       ipa: Union[IPAClient, IPAIndex, None] = None) -> None:
     sector = cert_opts['sector']
     if sector == 'private':
         _validate_private_arguments(cert_opts)
     elif sector == 'public':
-        _validate_public_arguments(cert_opts)
+        _validate_public_arguments(cert_opts, ipa)
     else:
         emsg = f'Invalid value for sector ({sector})'
         raise Exception(emsg)
 
 
-def gen_private_key(key_size: int, key_out: pathlib.PosixPath) -> rsa.RSAPrivateKey:  # noqa
+def _new_private_key(key_size: int,
+                     pool: Optional['KeyPool'] = None) -> rsa.RSAPrivateKey:
+    # generate private key (or take a pre-generated one)
+    if pool is not None:
+        return pool.get(key_size)
+    return rsa.generate_private_key(
+        public_exponent=65537,
+        key_size=key_size
+    )
+
+
+def _key_bytes(key: rsa.RSAPrivateKey,
+               encoding: serialization.Encoding = serialization.Encoding.PEM) -> bytes:  # noqa
+    return key.private_bytes(
+        encoding=encoding,
+        format=serialization.PrivateFormat.TraditionalOpenSSL,
+        encryption_algorithm=serialization.NoEncryption()
+    )
+
+
+def gen_private_key(key_size: int, key_out: pathlib.PosixPath,
+                    pool: Optional['KeyPool'] = None) -> rsa.RSAPrivateKey:
     # check if the private key file already exists
     if key_out.exists():
         emsg = f'File {key_out} already exists'
         raise Exception(emsg)
 
-    # generate private key
-    key = rsa.generate_private_key(
-        public_exponent=65537,
-        key_size=key_size
-    )
+    key = _new_private_key(key_size, pool)
 
     # write to file
     with open(key_out, "wb") as fp:
-        fp.write(key.private_bytes(
-            encoding=serialization.Encoding.PEM,
-            format=serialization.PrivateFormat.TraditionalOpenSSL,
-            encryption_algorithm=serialization.NoEncryption()
-        ))
+        fp.write(_key_bytes(key))
         fp.close()
 
     return key
@@ -160,165 +156,232 @@ def _subject(cert_opts: Dict) -> x509.Name:
     ])
 
 
+def _policy(oid: str, text: str) -> x509.PolicyInformation:
+    return x509.PolicyInformation(
+        x509.ObjectIdentifier(oid), [x509.UserNotice(None, text)]
+    )
+
+
+# extension objects are immutable, they are built once per process
+
+# certificate policies
+POLICIES = {
+    'private': x509.CertificatePolicies([
+        _policy('1.3.76.16', 'AgIDroot'),
+        _policy('1.3.76.16.6', 'agIDcert'),
+        _policy('1.3.76.16.4.3.1', 'cert_SP_Priv'),
+    ]),
+    'public': x509.CertificatePolicies([
+        _policy('1.3.76.16', 'AgIDroot'),
+        _policy('1.3.76.16.6', 'agIDcert'),
+        _policy('1.3.76.16.4.2.1', 'cert_SP_Pub'),
+    ]),
+}
+
+# basicConstraints
+BASIC_CONSTRAINTS = x509.BasicConstraints(ca=False, path_length=None)
+
+# keyUsage
+KEY_USAGE = x509.KeyUsage(
+    digital_signature=True,
+    content_commitment=True,
+    key_encipherment=False,
+    data_encipherment=False,
+    key_agreement=False,
+    key_cert_sign=False,
+    crl_sign=False,
+    encipher_only=False,
+    decipher_only=False,
+)
+
 def _extensions(key: rsa.RSAPrivateKey, cert_opts: Dict) -> List[Tuple[bool, x509.Extension]]:  # noqa
     sector = cert_opts['sector']
-
-    # certificate policies
-    policies = [
-        x509.PolicyInformation(
-            x509.ObjectIdentifier('1.3.76.16'), [
-                x509.UserNotice(None, 'AgIDroot')
-            ]
-        ),
-        x509.PolicyInformation(
-            x509.ObjectIdentifier('1.3.76.16.6'), [
-                x509.UserNotice(None, 'agIDcert')
-            ]
-        ),
-    ]
-    if sector == 'private':
-        policies.append(
-            x509.PolicyInformation(
-                x509.ObjectIdentifier('1.3.76.16.4.3.1'), [
-                    x509.UserNotice(None, 'cert_SP_Priv')
-                ]
-            )
-        )
-    elif sector == 'public':
-        policies.append(
-            x509.PolicyInformation(
-                x509.ObjectIdentifier('1.3.76.16.4.2.1'), [
-                    x509.UserNotice(None, 'cert_SP_Pub')
-                ]
-            )
-        )
-    else:
+    if sector not in POLICIES:
         emsg = f'Invalid value for sector ({sector})'
         raise Exception(emsg)
 
     # extensions list
     return [
-        # basicCinstraints
-        (False, x509.BasicConstraints(ca=False, path_length=None)),
-        # keyUsage
-        (True, x509.KeyUsage(
-            digital_signature=True,
-            content_commitment=True,
-            key_encipherment=False,
-            data_encipherment=False,
-            key_agreement=False,
-            key_cert_sign=False,
-            crl_sign=False,
-            encipher_only=False,
-            decipher_only=False,
-        )),
-        # certifcatePolicies
-        (False, x509.CertificatePolicies(policies)),
+        (False, BASIC_CONSTRAINTS),
+        (True, KEY_USAGE),
+        (False, POLICIES[sector]),
         # subjectKeyIdentifier
         (False, x509.SubjectKeyIdentifier.from_public_key(key.public_key())),
     ]
 
 
-def gen_csr(key: rsa.RSAPrivateKey, cert_opts: Dict, crypto_opts: Dict) -> None:  # noqa
-    # init builder
-    builder = x509.CertificateSigningRequestBuilder()
+class Builder(object):
+    # subject, extensions and SKI are computed once and shared by the
+    # CSR and the self-signed certificate
+    def __init__(self, key: rsa.RSAPrivateKey, cert_opts: Dict,
+                 md_alg: str = 'sha256'):
+        self.key = key
+        self.cert_opts = cert_opts
+        self.md_alg = MD_ALGS[md_alg]
+        self.subject = _subject(cert_opts)
+        self.extensions = _extensions(key, cert_opts)
+        self.ski = self.extensions[-1][1]
+
+    def csr(self) -> x509.CertificateSigningRequest:
+        # init builder
+        builder = x509.CertificateSigningRequestBuilder()
+
+        # set subject
+        builder = builder.subject_name(self.subject)
+
+        # add extensions
+        for is_critical, ext in self.extensions:
+            builder = builder.add_extension(ext, critical=is_critical)
+
+        # sign the csr
+        return builder.sign(self.key, self.md_alg)
+
+    def crt(self) -> x509.Certificate:
+        # subject / issuer
+        subject = issuer = self.subject
+
+        # init builder
+        builder = x509.CertificateBuilder()
+
+        # set subject and issuer
+        builder = builder.subject_name(subject)
+        builder = builder.issuer_name(issuer)
+
+        # set public key
+        builder = builder.public_key(self.key.public_key())
+
+        # set serial number
+        serial = x509.random_serial_number()
+        builder = builder.serial_number(serial)
+
+        # set expiration
+        now = datetime.datetime.utcnow()
+        days = self.cert_opts['days']
+        builder = builder.not_valid_before(now)
+        builder = builder.not_valid_after(now + datetime.timedelta(days=days))
+
+        # add base extensions
+        for is_critical, ext in self.extensions:
+            builder = builder.add_extension(ext, critical=is_critical)
+
+        # add AuthorityKeyIdentifier extension, self-signed so it is the SKI
+        authority_cert_issuer = [x509.DirectoryName(issuer)]
+        builder = builder.add_extension(
+            x509.AuthorityKeyIdentifier(
+                self.ski.digest,
+                authority_cert_issuer,
+                serial
+            ),
+            critical=False
+        )
 
-    # set subject
-    builder = builder.subject_name(_subject(cert_opts))
+        # sign the certificate
+        return builder.sign(self.key, self.md_alg)
 
-    # add extensions
-    for is_critical, ext in _extensions(key, cert_opts):
-        builder = builder.add_extension(ext, critical=is_critical)
 
-    # sign the csr
-    md_alg = MD_ALGS[crypto_opts['md_alg']]
-    csr = builder.sign(key, md_alg)
+def _write_pem(obj: Union[x509.Certificate, x509.CertificateSigningRequest],
+               out: pathlib.PosixPath) -> None:
+    with open(str(out), "wb") as fp:
+        fp.write(obj.public_bytes(serialization.Encoding.PEM))
 
-    # write to file
-    csr_out = crypto_opts['csr_out']
-    with open(str(csr_out), "wb") as fp:
-        fp.write(csr.public_bytes(serialization.Encoding.PEM))
-        fp.close()
 
-    # this creates the CRT also for privates
-    gen_self_signed(key, cert_opts, crypto_opts)
+def gen_csr(key: rsa.RSAPrivateKey, cert_opts: Dict, crypto_opts: Dict) -> None:  # noqa
+    builder = Builder(key, cert_opts, crypto_opts['md_alg'])
+    _write_pem(builder.csr(), crypto_opts['csr_out'])
 
 
 def gen_self_signed(key: rsa.RSAPrivateKey, cert_opts: Dict, crypto_opts: Dict) -> None:  # noqa
-    # subject / issuer
-    subject = issuer = _subject(cert_opts)
-
-    # init builder
-    builder = x509.CertificateBuilder()
-
-    # set subject and issuer
-    builder = builder.subject_name(subject)
-    builder = builder.issuer_name(issuer)
-
-    # set public key
-    builder = builder.public_key(key.public_key())
-
-    # set serial number
-    serial = x509.random_serial_number()
-    builder = builder.serial_number(serial)
-
-    # set expiration
-    now = datetime.datetime.utcnow()
-    days = cert_opts['days']
-    builder = builder.not_valid_before(now)
-    builder = builder.not_valid_after(now + datetime.timedelta(days=days))
-
-    # add base extensions
-    for is_critical, ext in _extensions(key, cert_opts):
-        builder = builder.add_extension(ext, critical=is_critical)
-
-    # add AuthorityKeyIdentifier extension (experimental feature)
-    pkey = key.public_key()
-    key_identifier = x509.extensions._key_identifier_from_public_key(pkey)
-    authority_cert_issuer = [x509.DirectoryName(issuer)]
-    builder = builder.add_extension(
-        x509.AuthorityKeyIdentifier(
-            key_identifier,
-            authority_cert_issuer,
-            serial
-        ),
-        critical=False
+    builder = Builder(key, cert_opts, crypto_opts['md_alg'])
+    _write_pem(builder.crt(), crypto_opts['crt_out'])
+
+
+def gen_csr_and_crt(key: rsa.RSAPrivateKey, cert_opts: Dict, crypto_opts: Dict) -> None:  # noqa
+    # every sector gets the certificate, the validator checks crt.pem
+    builder = Builder(key, cert_opts, crypto_opts['md_alg'])
+    _write_pem(builder.csr(), crypto_opts['csr_out'])
+    _write_pem(builder.crt(), crypto_opts['crt_out'])
+
+
+class Generated(NamedTuple):
+    key: rsa.RSAPrivateKey
+    csr: x509.CertificateSigningRequest
+    crt: x509.Certificate
+
+
+class GeneratedBytes(NamedTuple):
+    key: bytes
+    csr: bytes
+    crt: bytes
+
+
+def _build(cert_opts: Dict, crypto_opts: Optional[Dict] = None,
+           pool: Optional['KeyPool'] = None) -> Generated:
+    # crypto_opts only needs key_size and md_alg, nothing is written
+    crypto_opts = crypto_opts or {}
+    key = _new_private_key(crypto_opts.get('key_size', 2048), pool)
+    builder = Builder(key, cert_opts, crypto_opts.get('md_alg', 'sha256'))
+    return Generated(key, builder.csr(), builder.crt())
+
+
+def _encode(g: Generated, encoding: str = 'PEM') -> GeneratedBytes:
+    if encoding not in ['PEM', 'DER']:
+        emsg = f'Invalid value for encoding ({encoding})'
+        raise ValueError(emsg)
+    enc = getattr(serialization.Encoding, encoding)
+    return GeneratedBytes(
+        _key_bytes(g.key, enc),
+        g.csr.public_bytes(enc),
+        g.crt.public_bytes(enc),
     )
 
-    # sign the certificate
-    md_alg = MD_ALGS[crypto_opts['md_alg']]
-    crt = builder.sign(key, md_alg)
 
-    # write to file
-    crt_out = crypto_opts['crt_out']
-    with open(str(crt_out), "wb") as fp:
-        fp.write(crt.public_bytes(serialization.Encoding.PEM))
-        fp.close()
+def _build_bytes(cert_opts: Dict, crypto_opts: Optional[Dict] = None,
+                 encoding: str = 'PEM') -> GeneratedBytes:
+    # bytes can be sent back from a worker process, keys can not
+    return _encode(_build(cert_opts, crypto_opts), encoding)
+
+
+def generate_objects(cert_opts: Dict, crypto_opts: Optional[Dict] = None,
+                     pool: Optional['KeyPool'] = None,
+                     ipa: Union[IPAClient, IPAIndex, None] = None) -> Generated:  # noqa
+    validate_arguments(cert_opts, ipa)
+    return _build(cert_opts, crypto_opts, pool)
+
 
+def generate_bytes(cert_opts: Dict, crypto_opts: Optional[Dict] = None,
+                   pool: Optional['KeyPool'] = None,
+                   ipa: Union[IPAClient, IPAIndex, None] = None,
+                   encoding: str = 'PEM') -> GeneratedBytes:
+    return _encode(generate_objects(cert_opts, crypto_opts, pool, ipa),
+                   encoding)
 
-def generate(cert_opts: Dict, crypto_opts: Dict) -> None:
+
+def generate(cert_opts: Dict, crypto_opts: Dict,
+             pool: Optional['KeyPool'] = None,
+             ipa: Union[IPAClient, IPAIndex, None] = None) -> None:
     # validate arguments
-    validate_arguments(cert_opts)
+    validate_arguments(cert_opts, ipa)
 
     # generate private key
     key_size = crypto_opts['key_size']
     key_out = crypto_opts['key_out']
-    key = gen_private_key(key_size, key_out)
-    LOG.info(f'Private key saved to {key_out}')
-    LOG.info(f'  Inspect with OpenSSL: openssl rsa -in {key_out} -noout -text')
+    key = gen_private_key(key_size, key_out, pool)
+    LOG.info('Private key saved to %s', key_out)
+    LOG.info('  Inspect with OpenSSL: openssl rsa -in %s -noout -text',
+             key_out)
 
-    # generate the csr
+    # generate the csr and the self-signed certificate
     csr_out = crypto_opts['csr_out']
-    gen_csr(key, cert_opts, crypto_opts)
-    LOG.info(f'CSR saved to {csr_out}')
-    LOG.info(f'  Inspect with OpenSSL: openssl req -in {csr_out} -noout -text')
-    LOG.info(f'  Inspect with OpenSSL: openssl asn1parse -i -inform PEM -in {csr_out}')  # noqa
-
-    # generate self-signed certificate
-    sector = cert_opts['sector']
     crt_out = crypto_opts['crt_out']
-    if sector == 'public':
-        gen_self_signed(key, cert_opts, crypto_opts)
-        LOG.info(f'Self-signed certificate saved to {crt_out}')
-        LOG.info(f'  Inspect with OpenSSL: openssl x509 -noout -text -in {crt_out}')  # noqa
-        LOG.info(f'  Inspect with OpenSSL: openssl asn1parse -i -inform PEM -in {crt_out}')  # noqa
+    gen_csr_and_crt(key, cert_opts, crypto_opts)
+    LOG.info('CSR saved to %s', csr_out)
+    LOG.info('  Inspect with OpenSSL: openssl req -in %s -noout -text',
+             csr_out)
+    LOG.info('  Inspect with OpenSSL: openssl asn1parse -i -inform PEM -in %s',  # noqa
+             csr_out)
+
+    LOG.info('Self-signed certificate saved to %s', crt_out)
+    LOG.info('  Inspect with OpenSSL: openssl x509 -noout -text -in %s',
+             crt_out)
+    LOG.info('  Inspect with OpenSSL: openssl asn1parse -i -inform PEM -in %s',  # noqa
+             crt_out)
@@ -0,0 +1,165 @@
+# Copyright 2021 Paolo Smiraglia <paolo.smiraglia@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import json
+import os
+import pathlib
+import threading
+import time
+from typing import Dict, Optional
+
+SEARCH_API = 'https://indicepa.gov.it/PortaleServices/api/ente/ricerca'
+SEARCH_UI = 'https://indicepa.gov.it/ipa-portale/consultazione/indirizzo-sede/ricerca-ente'  # noqa
+
+# one week, the IPA registry does not change that often
+DEFAULT_TTL = 7 * 24 * 3600
+
+
+def _query(ipa_code: str) -> str:
+    return json.dumps({
+        'area': None,
+        'codEnte': ipa_code,
+        'codiceCategoria': None,
+        'codiceFiscaleRicerca': None,
+        'denominazione': None,
+        'idTipoServizioDigitale': None,
+        'lingueMinoritarie': None,
+        'paginazione': {
+            'campoOrdinamento': 'idEnte',
+            'numTotalePagine': None,
+            'numeroRigheTotali': None,
+            'paginaCorrente': None,
+            'paginaRichiesta': 1,
+            'righePerPagina': None,
+            'tipoOrdinamento': 'asc',
+        }
+    }, separators=(',', ':'))
+
+
+class IPAClient(object):
+    # looks up IPA codes on indicepa.gov.it, reusing the connection and
+    # remembering the codes already resolved
+    def __init__(self, api: Optional[str] = None, timeout: float = 10.0,
+                 cache_file: Optional[pathlib.Path] = None,
+                 ttl: int = DEFAULT_TTL):
+        self.api = api or SEARCH_API
+        self.timeout = timeout
+        self.cache_file = cache_file
+        self.ttl = ttl
+        self._session = None
+        self._lock = threading.Lock()
+        self._cache: Dict[str, float] = {}
+        if cache_file is not None:
+            self._cache = self._load(pathlib.Path(cache_file))
+
+    def _load(self, cache_file: pathlib.Path) -> Dict[str, float]:
+        try:
+            with open(cache_file) as fp:
+                data = json.load(fp)
+        except (FileNotFoundError, ValueError):
+            # a missing or broken cache is just an empty one
+            return {}
+        if not isinstance(data, dict):
+            return {}
+        now = time.time()
+        return {k: v for k, v in data.items()
+                if isinstance(v, (int, float)) and v > now}
+
+    def _save(self) -> None:
+        cache_file = pathlib.Path(self.cache_file)
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        # other processes may have resolved further codes in the meantime
+        self._cache = dict(self._load(cache_file), **self._cache)
+        tmp = cache_file.with_name(f'.{cache_file.name}.{os.getpid()}')
+        with open(tmp, 'w') as fp:
+            json.dump(self._cache, fp)
+        os.replace(tmp, cache_file)
+
+    def __getstate__(self) -> Dict:
+        # sessions and locks do not cross process boundaries
+        return {
+            'api': self.api,
+            'timeout': self.timeout,
+            'cache_file': self.cache_file,
+            'ttl': self.ttl,
+        }
+
+    def __setstate__(self, state: Dict) -> None:
+        self.__init__(**state)
+
+    @property
+    def session(self):
+        if self._session is None:
+            # imported here, only the public sector needs it
+            import requests
+
+            self._session = requests.Session()
+            self._session.headers['content-type'] = 'application/json'
+        return self._session
+
+    def _lookup(self, ipa_code: str) -> bool:
+        import requests
+
+        try:
+            r = self.session.post(self.api, data=_query(ipa_code),
+                                  timeout=self.timeout)
+            r.raise_for_status()
+            res = r.json()
+        except (requests.RequestException, ValueError) as e:
+            emsg = f'Unable to check the IPA code ({ipa_code}) on {self.api}: {e}'  # noqa
+            raise ValueError(emsg)
+
+        try:
+            return any(e['codEnte'] == ipa_code
+                       for e in res['risposta']['listaResponse'] or [])
+        except (KeyError, TypeError) as e:
+            emsg = f'Unexpected response from {self.api} for the IPA code ({ipa_code}): {e!r}'  # noqa
+            raise ValueError(emsg)
+
+    def exists(self, ipa_code: str) -> bool:
+        now = time.time()
+        with self._lock:
+            if self._cache.get(ipa_code, 0) > now:
+                return True
+
+        if not self._lookup(ipa_code):
+            return False
+
+        # only existing codes are cached, so a typo does not stick around
+        with self._lock:
+            self._cache[ipa_code] = now + self.ttl
+            if self.cache_file is not None:
+                self._save()
+        return True
+
+    def close(self) -> None:
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+
+_default_client = None
+
+
+def get_client() -> IPAClient:
+    global _default_client
+    if _default_client is None:
+        _default_client = IPAClient()
+    return _default_client
@@ -0,0 +1,167 @@
+# Copyright 2021 Paolo Smiraglia <paolo.smiraglia@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os
+import pathlib
+import threading
+import uuid
+from collections import deque
+from typing import Dict, Iterable, Optional
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from spid_compliant_certificates.commons import logger
+from spid_compliant_certificates.generator.generate import (
+    KEY_SIZES,
+    _new_private_key,
+)
+
+LOG = logger.LOG
+
+
+class KeyPool(object):
+    # keeps `depth` RSA keys per size ready to be used, either in memory
+    # or in a spool directory that can be shared between processes
+    def __init__(self, sizes: Iterable[int] = KEY_SIZES, depth: int = 4,
+                 spool_dir: Optional[pathlib.Path] = None,
+                 poll_interval: float = 1.0):
+        self.sizes = tuple(sizes)
+        for size in self.sizes:
+            if size not in KEY_SIZES:
+                emsg = f'Invalid key size ({size})'
+                raise ValueError(emsg)
+        self.depth = depth
+        self.spool_dir = None
+        self.poll_interval = poll_interval
+        self._keys: Dict[int, deque] = {s: deque() for s in self.sizes}
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stop = False
+
+        if spool_dir is not None:
+            self.spool_dir = pathlib.Path(spool_dir)
+            self.spool_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+            for size in self.sizes:
+                d = self.spool_dir / str(size)
+                d.mkdir(mode=0o700, parents=True, exist_ok=True)
+                # mkdir() does not fix the mode of existing directories
+                os.chmod(d, 0o700)
+
+    def __enter__(self) -> 'KeyPool':
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _spooled(self, key_size: int):
+        return sorted((self.spool_dir / str(key_size)).glob('*.pem'))
+
+    def available(self, key_size: int) -> int:
+        if self.spool_dir is not None:
+            return len(self._spooled(key_size))
+        with self._cond:
+            return len(self._keys[key_size])
+
+    def _put(self, key_size: int, key: rsa.RSAPrivateKey) -> None:
+        if self.spool_dir is None:
+            with self._cond:
+                self._keys[key_size].append(key)
+            return
+
+        pem = key.private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.TraditionalOpenSSL,
+            encryption_algorithm=serialization.NoEncryption()
+        )
+        # written under a temporary name and renamed, so that readers
+        # never see partial keys
+        d = self.spool_dir / str(key_size)
+        name = uuid.uuid4().hex
+        tmp = d / f'.{name}.tmp'
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, 'wb') as fp:
+            fp.write(pem)
+        os.replace(tmp, d / f'{name}.pem')
+
+    def _take(self, key_size: int) -> Optional[rsa.RSAPrivateKey]:
+        if self.spool_dir is None:
+            with self._cond:
+                keys = self._keys[key_size]
+                return keys.popleft() if keys else None
+
+        for path in self._spooled(key_size):
+            # claim the key by renaming it, only one process can succeed
+            claimed = path.with_suffix('.claimed')
+            try:
+                os.replace(path, claimed)
+            except FileNotFoundError:
+                continue
+            try:
+                with open(claimed, 'rb') as fp:
+                    return serialization.load_pem_private_key(fp.read(),
+                                                              None)
+            finally:
+                os.unlink(claimed)
+        return None
+
+    def get(self, key_size: int) -> rsa.RSAPrivateKey:
+        if key_size not in self.sizes:
+            return _new_private_key(key_size)
+        key = self._take(key_size)
+        with self._cond:
+            self._cond.notify()
+        if key is None:
+            # pool exhausted, do not make the caller wait for the refill
+            LOG.debug('Key pool for %d bits is empty', key_size)
+            key = _new_private_key(key_size)
+        return key
+
+    def fill(self) -> None:
+        for size in self.sizes:
+            while not self._stop and self.available(size) < self.depth:
+                self._put(size, _new_private_key(size))
+
+    def _run(self) -> None:
+        while not self._stop:
+            try:
+                self.fill()
+            except Exception as e:
+                LOG.error('Unable to refill the key pool: %s', e)
+            with self._cond:
+                if not self._stop:
+                    self._cond.wait(self.poll_interval)
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop = False
+        self._thread = threading.Thread(target=self._run,
+                                        name='key-pool', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        with self._cond:
+            self._stop = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
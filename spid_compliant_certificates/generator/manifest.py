@@ -0,0 +1,204 @@
+# Copyright 2021 Paolo Smiraglia <paolo.smiraglia@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import csv
+import pathlib
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Iterator, List, NamedTuple, Optional, Union
+
+from spid_compliant_certificates.commons.ipa_index import IPAIndex
+from spid_compliant_certificates.generator.generate import (
+    KEY_SIZES,
+    MD_ALGS,
+    gen_csr_and_crt,
+    gen_private_key,
+    validate_arguments,
+)
+from spid_compliant_certificates.generator.ipa import IPAClient
+
+CERT_FIELDS = ['common_name', 'days', 'entity_id', 'locality_name',
+               'org_id', 'org_name', 'sector']
+
+
+class Result(NamedTuple):
+    name: str
+    out_dir: str
+    key_size: int
+    elapsed: float
+    error: Optional[str]
+
+
+def _slug(value: str) -> str:
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', value).strip('_') or 'entity'
+
+
+def _entity_dir(out_dir: pathlib.Path, name: str) -> pathlib.Path:
+    # the entity name becomes a folder, it must stay inside out_dir
+    ent_dir = out_dir / name
+    if name in ['', '.', '..'] or \
+            out_dir.resolve() not in ent_dir.resolve().parents:
+        emsg = f'Invalid entity name ({name}), it must be a folder in {out_dir}'  # noqa
+        raise ValueError(emsg)
+    return ent_dir
+
+
+def _read_entries(manifest: pathlib.Path) -> List[Dict]:
+    suffix = manifest.suffix.lower()
+    if suffix == '.csv':
+        with open(manifest, newline='') as fp:
+            return list(csv.DictReader(fp))
+    elif suffix in ['.yml', '.yaml']:
+        # imported here, only YAML manifests need it
+        from ruamel.yaml import YAML
+
+        with open(manifest) as fp:
+            data = YAML(typ='safe').load(fp)
+        # both a plain list and {'entities': [...]} are accepted
+        if isinstance(data, dict):
+            data = data.get('entities')
+        if not isinstance(data, list):
+            emsg = f'Manifest {manifest} must contain a list of entities'
+            raise ValueError(emsg)
+        return data
+    else:
+        emsg = f'Manifest {manifest} must be a CSV or a YAML file'
+        raise ValueError(emsg)
+
+
+def load_manifest(manifest: pathlib.Path,
+                  defaults: Optional[Dict] = None) -> List[Dict]:
+    entities = []
+    names = set()
+    for i, entry in enumerate(_read_entries(manifest), start=1):
+        if not isinstance(entry, dict):
+            emsg = f'Entity #{i} in {manifest} must be a mapping of fields'
+            raise ValueError(emsg)
+
+        # empty CSV cells fall back to the defaults
+        e = dict(defaults or {})
+        e.update({k: v for k, v in entry.items() if v not in [None, '']})
+
+        missing = [k for k in CERT_FIELDS if k not in e]
+        if missing:
+            emsg = f'Entity #{i} in {manifest} misses {", ".join(missing)}'
+            raise ValueError(emsg)
+
+        try:
+            e['days'] = int(e['days'])
+            e['key_size'] = int(e.get('key_size', 2048))
+        except ValueError as ex:
+            emsg = f'Entity #{i} in {manifest} has a non integer value ({ex})'
+            raise ValueError(emsg)
+        e.setdefault('md_alg', 'sha256')
+
+        if e['key_size'] not in KEY_SIZES:
+            emsg = f'Invalid key size for entity #{i} ({e["key_size"]})'
+            raise ValueError(emsg)
+        if e['md_alg'] not in MD_ALGS:
+            emsg = f'Invalid digest algorithm for entity #{i} ({e["md_alg"]})'  # noqa
+            raise ValueError(emsg)
+
+        e['name'] = _slug(str(e.get('name') or e['common_name']))
+        if e['name'] in ['.', '..']:
+            emsg = f'Entity #{i} in {manifest} has an invalid name ({e["name"]})'  # noqa
+            raise ValueError(emsg)
+        if e['name'] in names:
+            emsg = f'Entity #{i} in {manifest} has a duplicated name ({e["name"]})'  # noqa
+            raise ValueError(emsg)
+        names.add(e['name'])
+
+        entities.append(e)
+    return entities
+
+
+def _generate_entity(entity: Dict, out_dir: pathlib.Path) -> Result:
+    start = time.perf_counter()
+    ent_dir = _entity_dir(out_dir, entity['name'])
+    cert_opts = {k: entity[k] for k in CERT_FIELDS}
+    crypto_opts = {
+        'crt_out': ent_dir / 'crt.pem',
+        'csr_out': ent_dir / 'csr.pem',
+        'key_out': ent_dir / 'key.pem',
+        'key_size': entity['key_size'],
+        'md_alg': entity['md_alg'],
+    }
+
+    error = None
+    try:
+        ent_dir.mkdir(parents=True, exist_ok=True)
+        key = gen_private_key(crypto_opts['key_size'],
+                              crypto_opts['key_out'])
+        gen_csr_and_crt(key, cert_opts, crypto_opts)
+    except Exception as e:
+        # one broken entity must not stop the whole manifest
+        error = str(e)
+
+    return Result(entity['name'], str(ent_dir), entity['key_size'],
+                  time.perf_counter() - start, error)
+
+
+def iter_generate_many(entities: List[Dict], out_dir: pathlib.Path,
+                       workers: Optional[int] = None,
+                       ipa: Union[IPAClient, IPAIndex, None] = None) -> Iterator[Result]:  # noqa
+    out_dir = pathlib.Path(out_dir)
+    # fail before generating anything, not entity by entity
+    for e in entities:
+        _entity_dir(out_dir, e['name'])
+
+    # the IPA lookups run here, sharing one session and one cache,
+    # workers only generate keys and certificates
+    valid = []
+    for e in entities:
+        start = time.perf_counter()
+        try:
+            validate_arguments({k: e[k] for k in CERT_FIELDS}, ipa)
+        except Exception as ex:
+            yield Result(e['name'], str(out_dir / e['name']), e['key_size'],
+                         time.perf_counter() - start, str(ex))
+            continue
+        valid.append(e)
+
+    # no need to pay for a process pool
+    if workers == 1 or len(valid) < 2:
+        for e in valid:
+            yield _generate_entity(e, out_dir)
+        return
+
+    # key generation dominates, results are yielded as they complete
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_generate_entity, e, out_dir)
+                   for e in valid]
+        for f in as_completed(futures):
+            yield f.result()
+
+
+def throughput(results: List[Result], elapsed: float) -> Dict:
+    ok = [r for r in results if r.error is None]
+    return {
+        'entities': len(results),
+        'generated': len(ok),
+        'failed': len(results) - len(ok),
+        'elapsed': elapsed,
+        'per_second': len(ok) / elapsed if elapsed else 0.0,
+        # time spent in workers over wall time, i.e. effective parallelism
+        'speedup': sum(r.elapsed for r in results) / elapsed if elapsed else 0.0,  # noqa
+    }
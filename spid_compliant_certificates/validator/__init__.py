@@ -18,8 +18,32 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-from spid_compliant_certificates.validator.validate import validate  # noqa
+from spid_compliant_certificates.validator.plan import (  # noqa
+    register_rule,
+    use_ipa_index,
+)
+from spid_compliant_certificates.validator.validate import (  # noqa
+    validate,
+    validate_bytes,
+    validate_certificate,
+)
+
+
+def __getattr__(name: str):
+    # the process pool machinery is only paid for by batch validation
+    if name == 'validate_many':
+        from spid_compliant_certificates.validator.batch import validate_many
+
+        return validate_many
+    emsg = f'module {__name__!r} has no attribute {name!r}'
+    raise AttributeError(emsg)
+
 
 _all_ = [
+    'register_rule',
+    'use_ipa_index',
     'validate',
+    'validate_bytes',
+    'validate_certificate',
+    'validate_many',
 ]
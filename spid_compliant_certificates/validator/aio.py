@@ -0,0 +1,104 @@
+# Copyright 2021 Paolo Smiraglia <paolo.smiraglia@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import partial
+from typing import Optional, Union
+
+from cryptography import x509
+from cryptography.hazmat.primitives import serialization
+
+from spid_compliant_certificates.validator.batch import (
+    _get_executor,
+    _validate_bytes_in_worker,
+)
+from spid_compliant_certificates.validator.cache import ReportCache
+from spid_compliant_certificates.validator.report import Report
+from spid_compliant_certificates.validator.validate import validate_bytes
+
+
+class AsyncValidator(object):
+    # validations run on `executor` (the loop default one if None), at
+    # most `max_concurrency` of them are in flight at the same time;
+    # with `workers` and no executor, they run on a process pool whose
+    # workers set up the cache and the IPA index once (a process pool
+    # given as executor must come from batch._get_executor())
+    def __init__(self, executor: Optional[Executor] = None,
+                 max_concurrency: int = 16,
+                 cache: Optional[ReportCache] = None,
+                 workers: Optional[int] = None):
+        self._own_executor = executor is None and workers is not None
+        if self._own_executor:
+            executor = _get_executor(workers, cache)
+        self.executor = executor
+        self.max_concurrency = max_concurrency
+        self.cache = cache
+        self._semaphore = None
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        # created lazily, it must belong to the running loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def validate(self, data: Union[bytes, x509.Certificate],
+                       sector: str, target: str = 'bytes',
+                       fail_fast: bool = False) -> Report:
+        # certificate objects can not be sent to a worker process
+        if isinstance(data, x509.Certificate):
+            data = data.public_bytes(serialization.Encoding.DER)
+
+        if isinstance(self.executor, ProcessPoolExecutor):
+            # the cache is not sent along, it would reach the worker
+            # empty: workers use the one set up by _init_worker()
+            fn = partial(_validate_bytes_in_worker, data, sector, target,
+                         fail_fast)
+        else:
+            fn = partial(validate_bytes, data, sector, target, self.cache,
+                         None, fail_fast)
+
+        loop = asyncio.get_running_loop()
+        async with self.semaphore:
+            # a cancellation while waiting drops the job if it has not
+            # started yet, a running validation is left to complete
+            return await loop.run_in_executor(self.executor, fn)
+
+    def close(self) -> None:
+        if self._own_executor:
+            self.executor.shutdown()
+            self._own_executor = False
+
+    def __enter__(self) -> 'AsyncValidator':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+async def avalidate(data: Union[bytes, x509.Certificate], sector: str,
+                    target: str = 'bytes',
+                    executor: Optional[Executor] = None,
+                    cache: Optional[ReportCache] = None,
+                    fail_fast: bool = False) -> Report:
+    # no concurrency limit, use AsyncValidator to share one
+    v = AsyncValidator(executor, cache=cache)
+    return await v.validate(data, sector, target, fail_fast)
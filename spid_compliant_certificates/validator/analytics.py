@@ -0,0 +1,228 @@
+# Copyright 2021 Paolo Smiraglia <paolo.smiraglia@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import json
+import math
+from array import array
+from collections import Counter
+from datetime import datetime, timezone
+from itertools import compress, groupby
+from typing import IO, Any, Dict, Iterable, List, Optional, Tuple
+
+from spid_compliant_certificates.validator.plan import SECTORS
+from spid_compliant_certificates.validator.report import Report
+
+# check ids whose values feed the columns
+KEY_SIZE = 'key_type_and_size.allowed_size'
+DIGEST = 'digest_algorithm.allowed'
+NOT_AFTER = 'not_expired.not_after'
+
+DAY = 24 * 3600
+
+
+def _epoch(value: Any) -> float:
+    if isinstance(value, datetime):
+        dt = value
+    else:
+        # serialized reports (cache, store, jsonl) carry strings
+        try:
+            dt = datetime.fromisoformat(str(value))
+        except ValueError:
+            return math.nan
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+class FleetColumns(object):
+    # one row per certificate, stored as a struct of arrays; failure
+    # rates are aggregated while loading, so per-check results are
+    # never kept in memory
+    def __init__(self):
+        self.sectors = list(SECTORS)
+        self.digests: List[str] = []
+        self.check_ids: List[str] = []
+        self._digest_codes: Dict[str, int] = {}
+        self._check_codes: Dict[str, int] = {}
+
+        # columns
+        self.sector = array('B')
+        self.success = array('B')
+        self.key_size = array('I')
+        self.digest = array('B')
+        self.not_after = array('d')
+
+        # per (sector, check) counters
+        self._ran = {s: array('I') for s in self.sectors}
+        self._failed = {s: array('I') for s in self.sectors}
+
+    def __len__(self) -> int:
+        return len(self.sector)
+
+    def _code(self, codes: Dict[str, int], values: List[str],
+              value: str) -> int:
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(values)
+            values.append(value)
+        return code
+
+    def _check_code(self, check_id: str) -> int:
+        code = self._check_codes.get(check_id)
+        if code is None:
+            code = self._code(self._check_codes, self.check_ids, check_id)
+            for s in self.sectors:
+                self._ran[s].append(0)
+                self._failed[s].append(0)
+        return code
+
+    def _add(self, sector: str, success: bool,
+             checks: Iterable[Tuple[Optional[str], bool, Any]]) -> None:
+        if sector not in self._ran:
+            emsg = f'Invalid value for sector ({sector})'
+            raise ValueError(emsg)
+        ran, failed = self._ran[sector], self._failed[sector]
+        key_size, digest, not_after = 0, 255, math.nan
+        for check_id, ok, value in checks:
+            if check_id is None:
+                continue
+            code = self._check_code(check_id)
+            ran[code] += 1
+            if not ok:
+                failed[code] += 1
+            if check_id == KEY_SIZE:
+                key_size = int(value)
+            elif check_id == DIGEST and value is not None:
+                digest = self._code(self._digest_codes, self.digests,
+                                    str(value))
+            elif check_id == NOT_AFTER:
+                not_after = _epoch(value)
+
+        self.sector.append(self.sectors.index(sector))
+        self.success.append(1 if success else 0)
+        self.key_size.append(key_size)
+        self.digest.append(digest)
+        self.not_after.append(not_after)
+
+    def add(self, report: Report, sector: str) -> None:
+        self._add(sector, report.is_success(),
+                  ((c.id, c.success, c.value)
+                   for t in report.tests for c in t.checks))
+
+    def add_dict(self, d: Dict, sector: str) -> None:
+        self._add(sector, d['result'] == 'success',
+                  ((c.get('id'), c['result'] == 'success', c['value'])
+                   for t in d['tests'] for c in t['checks']))
+
+    @classmethod
+    def from_reports(cls, reports: Iterable[Report],
+                     sector: str) -> 'FleetColumns':
+        fc = cls()
+        for r in reports:
+            fc.add(r, sector)
+        return fc
+
+    @classmethod
+    def from_jsonl(cls, fp: IO, sector: str) -> 'FleetColumns':
+        # the output of validator --out-form jsonl
+        fc = cls()
+        for line in fp:
+            if line.strip():
+                fc.add_dict(json.loads(line), sector)
+        return fc
+
+    @classmethod
+    def from_store(cls, store) -> 'FleetColumns':
+        # straight from the tables, no Report is built
+        fc = cls()
+        store.flush()
+        rows = store._connect().execute(
+            'SELECT c.report_id, r.sector, r.result, c.check_id, '
+            + 'c.result, c.value FROM checks c '
+            + 'JOIN reports r ON r.id = c.report_id ORDER BY c.report_id'
+        )
+        for _, group in groupby(rows, key=lambda row: row[0]):
+            group = list(group)
+            sector, result = group[0][1], group[0][2]
+            fc._add(sector, result == 'success',
+                    ((check_id, res == 'success', json.loads(value))
+                     for _, _, _, check_id, res, value in group))
+        return fc
+
+    def _mask(self, sector: Optional[str]) -> Optional[bytes]:
+        if sector is None:
+            return None
+        # one byte per row, 1 where the sector matches (runs in C)
+        table = bytes(256)
+        code = self.sectors.index(sector)
+        table = table[:code] + b'\x01' + table[code + 1:]
+        return self.sector.tobytes().translate(table)
+
+    def _column(self, col: array, sector: Optional[str]) -> Iterable:
+        mask = self._mask(sector)
+        return col if mask is None else compress(col, mask)
+
+    def key_sizes(self, sector: Optional[str] = None) -> Dict[int, int]:
+        counts = Counter(self._column(self.key_size, sector))
+        counts.pop(0, None)
+        return dict(sorted(counts.items()))
+
+    def digest_algorithms(self, sector: Optional[str] = None) -> Dict[str, int]:  # noqa
+        counts = Counter(self._column(self.digest, sector))
+        return {self.digests[code]: n for code, n in sorted(counts.items())
+                if code < len(self.digests)}
+
+    def not_after_histogram(self, bucket_days: int = 30,
+                            sector: Optional[str] = None) -> Dict[str, int]:
+        width = bucket_days * DAY
+        counts = Counter(
+            int(x // width) for x in self._column(self.not_after, sector)
+            if x == x  # skips NaN
+        )
+        return {
+            datetime.fromtimestamp(b * width, timezone.utc).strftime('%Y-%m-%d'): n  # noqa
+            for b, n in sorted(counts.items())
+        }
+
+    def failure_rates(self, sector: Optional[str] = None) -> Dict[str, float]:  # noqa
+        sectors = self.sectors if sector is None else [sector]
+        rates = {}
+        for code, check_id in enumerate(self.check_ids):
+            ran = sum(self._ran[s][code] for s in sectors)
+            failed = sum(self._failed[s][code] for s in sectors)
+            if ran:
+                rates[check_id] = failed / ran
+        return rates
+
+    def summary(self) -> Dict:
+        d = {
+            'certificates': len(self),
+            'failures': len(self) - sum(self.success),
+            'key_sizes': self.key_sizes(),
+            'digest_algorithms': self.digest_algorithms(),
+            'not_after': self.not_after_histogram(),
+            'failure_rates': {},
+        }
+        for s in self.sectors:
+            rates = self.failure_rates(s)
+            if any(self._ran[s]):
+                d['failure_rates'][s] = {k: v for k, v in rates.items()
+                                         if v}
+        return d
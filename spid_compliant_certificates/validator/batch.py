@@ -0,0 +1,158 @@
+# Copyright 2021 Paolo Smiraglia <paolo.smiraglia@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import pathlib
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from multiprocessing.util import Finalize
+from typing import Iterable, Iterator, List, Optional, Union
+
+from cryptography import x509
+
+from spid_compliant_certificates.commons.ipa_index import IPAIndex
+from spid_compliant_certificates.validator.cache import ReportCache
+from spid_compliant_certificates.validator.plan import (
+    get_ipa_index,
+    use_ipa_index,
+)
+from spid_compliant_certificates.validator.report import (
+    FAILURE,
+    BatchReport,
+    Check,
+    Report,
+    Test,
+)
+from spid_compliant_certificates.validator.utils import iter_der
+from spid_compliant_certificates.validator.validate import (
+    _validate,
+    validate_bytes,
+)
+
+# cache of the current worker process, set up once by _init_worker()
+_worker_cache: Optional[ReportCache] = None
+
+
+def _load_failure(target: str, e: Exception) -> Report:
+    rep = Report(target)
+    test = Test('Loading the certificate', 'load')
+    test.add_check(Check('The certificate must be loadable',
+                         FAILURE, str(e), 'load.certificate'))
+    rep.add_test(test)
+    return rep
+
+
+def _validate_one(crt_file: pathlib.Path, sector: str,
+                  cache: Optional[ReportCache] = None,
+                  fail_fast: bool = False) -> List[Report]:
+    # a file may be a bundle of several certificates
+    target = str(crt_file.absolute())
+    reports = []
+    try:
+        for i, der in enumerate(iter_der(crt_file)):
+            _target = f'{target}#{i}' if i else target
+            try:
+                crt = x509.load_der_x509_certificate(der)
+                reports.append(_validate(crt, _target, sector, cache,
+                                         fail_fast=fail_fast))
+            except Exception as e:
+                reports.append(_load_failure(_target, e))
+    except Exception as e:
+        # keep going with the rest of the batch, but record the failure
+        reports.append(_load_failure(target, e))
+
+    if not reports:
+        emsg = f'Certificate at {crt_file} must be a PEM'
+        reports.append(_load_failure(target, Exception(emsg)))
+
+    return reports
+
+
+def _init_worker(cache: Optional[ReportCache],
+                 ipa_index: Optional[IPAIndex] = None) -> None:
+    # one cache per worker, so that its in-memory tier and its sqlite
+    # connection outlive the single task
+    global _worker_cache
+    _worker_cache = cache
+    if cache is not None:
+        Finalize(cache, cache.close, exitpriority=10)
+    # the index travels as its path, spawned workers do not inherit it
+    use_ipa_index(ipa_index)
+
+
+def _get_executor(workers: Optional[int] = None,
+                  cache: Optional[ReportCache] = None) -> ProcessPoolExecutor:  # noqa
+    return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                               initargs=(cache, get_ipa_index()))
+
+
+def _get_worker_cache() -> Optional[ReportCache]:
+    return _worker_cache
+
+
+def _validate_in_worker(crt_file: pathlib.Path, sector: str,
+                        fail_fast: bool = False) -> List[Report]:
+    return _validate_one(crt_file, sector, _worker_cache, fail_fast)
+
+
+def _validate_bytes_in_worker(data: Union[bytes, x509.Certificate],
+                              sector: str, target: str = 'bytes',
+                              fail_fast: bool = False) -> Report:
+    return validate_bytes(data, sector, target, _worker_cache,
+                          fail_fast=fail_fast)
+
+
+def find_certificates(crt_dir: pathlib.Path, pattern: str = '*.pem') -> List[pathlib.Path]:  # noqa
+    if not crt_dir.is_dir():
+        emsg = f'Directory {crt_dir} not found'
+        raise ValueError(emsg)
+    return sorted(p for p in crt_dir.glob(pattern) if p.is_file())
+
+
+def iter_validate_many(crt_files: Iterable[pathlib.Path], sector: str,
+                       workers: Optional[int] = None,
+                       chunk_size: int = 16,
+                       cache: Optional[ReportCache] = None,
+                       fail_fast: bool = False) -> Iterator[Report]:
+    crt_files = [pathlib.Path(f) for f in crt_files]
+
+    # no need to pay for a process pool
+    if workers == 1 or len(crt_files) < 2:
+        for reports in map(_validate_one, crt_files, repeat(sector),
+                           repeat(cache), repeat(fail_fast)):
+            yield from reports
+        return
+
+    with _get_executor(workers, cache) as executor:
+        for reports in executor.map(_validate_in_worker, crt_files,
+                                    repeat(sector), repeat(fail_fast),
+                                    chunksize=max(1, chunk_size)):
+            yield from reports
+
+
+def validate_many(crt_files: Iterable[pathlib.Path], sector: str,
+                  workers: Optional[int] = None,
+                  chunk_size: int = 16,
+                  cache: Optional[ReportCache] = None,
+                  fail_fast: bool = False) -> BatchReport:
+    batch = BatchReport()
+    for rep in iter_validate_many(crt_files, sector, workers, chunk_size,
+                                  cache, fail_fast):
+        batch.add_report(rep)
+    return batch
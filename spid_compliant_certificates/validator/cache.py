@@ -0,0 +1,144 @@
+# Copyright 2021 Paolo Smiraglia <paolo.smiraglia@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+from spid_compliant_certificates.validator.plan import ruleset_version
+from spid_compliant_certificates.validator.report import Report
+
+if TYPE_CHECKING:
+    import sqlite3
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS reports (
+    fingerprint TEXT NOT NULL,
+    sector TEXT NOT NULL,
+    ruleset TEXT NOT NULL,
+    expires REAL,
+    report TEXT NOT NULL,
+    PRIMARY KEY (fingerprint, sector, ruleset)
+)
+'''
+
+
+def expiry_for(not_valid_after: datetime) -> Optional[float]:
+    # checks.not_expired flips when notAfter is reached; once the
+    # certificate is expired the outcome can not change anymore
+    expires = not_valid_after.timestamp()
+    return expires if expires > time.time() else None
+
+
+class ReportCache(object):
+    def __init__(self, path: Optional[str] = None, max_entries: int = 1024):
+        self.path = path
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._db = None
+        # one connection shared by the threads, guarded as the LRU is
+        self._lock = threading.RLock()
+
+    # only the configuration travels to worker processes
+    def __getstate__(self) -> Dict:
+        return {'path': self.path, 'max_entries': self.max_entries}
+
+    def __setstate__(self, state: Dict) -> None:
+        self.__init__(**state)
+
+    def _connect(self) -> 'sqlite3.Connection':
+        if self._db is None:
+            # the in-memory tier alone does not need sqlite
+            import sqlite3
+
+            self._db = sqlite3.connect(str(self.path), timeout=30,
+                                       check_same_thread=False)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute(_SCHEMA)
+        return self._db
+
+    def _key(self, fingerprint: str, sector: str) -> Tuple[str, str, str]:
+        # cached reports are bound to the rules that produced them
+        return (fingerprint, sector, ruleset_version())
+
+    def _remember(self, key: Tuple, expires: Optional[float], d: Dict) -> None:  # noqa
+        self._entries[key] = (expires, d)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, fingerprint: str, sector: str) -> Optional[Report]:
+        with self._lock:
+            return self._get(fingerprint, sector)
+
+    def _get(self, fingerprint: str, sector: str) -> Optional[Report]:
+        key = self._key(fingerprint, sector)
+        now = time.time()
+
+        entry = self._entries.get(key)
+        if entry is None and self.path is not None:
+            row = self._connect().execute(
+                'SELECT expires, report FROM reports '
+                + 'WHERE fingerprint = ? AND sector = ? AND ruleset = ?',
+                key
+            ).fetchone()
+            if row is not None:
+                entry = (row[0], json.loads(row[1]))
+                self._remember(key, *entry)
+
+        if entry is None:
+            return None
+
+        expires, d = entry
+        if expires is not None and expires <= now:
+            self._entries.pop(key, None)
+            return None
+
+        self._entries.move_to_end(key)
+        return Report.from_dict(d)
+
+    def put(self, report: Report, sector: str,
+            expires: Optional[float] = None) -> None:
+        key = self._key(report.fingerprint, sector)
+        d = report.as_dict()
+        with self._lock:
+            self._remember(key, expires, d)
+
+            if self.path is not None:
+                db = self._connect()
+                with db:
+                    db.execute(
+                        'INSERT OR REPLACE INTO reports '
+                        + 'VALUES (?, ?, ?, ?, ?)',
+                        key + (expires, json.dumps(d, default=str))
+                    )
+
+    def __len__(self) -> int:
+        # entries in the in-memory tier
+        return len(self._entries)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
@@ -0,0 +1,63 @@
+# Copyright 2021 Paolo Smiraglia <paolo.smiraglia@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from typing import Dict, FrozenSet, Optional, Tuple
+
+from cryptography import x509
+
+
+class ParsedCertificate(object):
+    __slots__ = (
+        'crt',
+        'extensions',
+        'extensions_error',
+        'hash_algorithm',
+        'not_valid_after',
+        'public_key',
+        'subject_attrs',
+        'subject_oids',
+    )
+
+    def __init__(self, crt: x509.Certificate):
+        self.crt = crt
+
+        # subject
+        self.subject_attrs: Tuple[x509.NameAttribute, ...] = tuple(crt.subject)  # noqa
+        self.subject_oids: FrozenSet[x509.ObjectIdentifier] = frozenset(
+            attr.oid for attr in self.subject_attrs
+        )
+
+        # extensions, by OID (parsing errors are reported by the caller)
+        self.extensions: Dict[x509.ObjectIdentifier, x509.Extension] = {}
+        self.extensions_error: Optional[ValueError] = None
+        try:
+            self.extensions = {ext.oid: ext for ext in crt.extensions}
+        except ValueError as e:
+            self.extensions_error = e
+
+        self.public_key = crt.public_key()
+
+        hash_alg = crt.signature_hash_algorithm
+        self.hash_algorithm: Optional[str] = hash_alg.name if hash_alg else None  # noqa
+
+        self.not_valid_after = crt.not_valid_after
+
+    def get_extension(self, ext_cls: type) -> Optional[x509.Extension]:
+        return self.extensions.get(ext_cls.oid)
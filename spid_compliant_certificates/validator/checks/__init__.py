@@ -18,25 +18,34 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-from spid_compliant_certificates.validator.checks.basic_constraints import \
-    basic_constraints  # noqa
-from spid_compliant_certificates.validator.checks.certificate_policies import \
-    certificate_policies  # noqa
-from spid_compliant_certificates.validator.checks.digest_algorithm import \
-    digest_algorithm  # noqa
-from spid_compliant_certificates.validator.checks.key_type_and_size import \
-    key_type_and_size  # noqa
-from spid_compliant_certificates.validator.checks.key_usage import \
-    key_usage  # noqa
-from spid_compliant_certificates.validator.checks.subject_dn import \
-    subject_dn  # noqa
-from spid_compliant_certificates.validator.checks.time_validity import \
-    not_expired  # noqa
+from spid_compliant_certificates.validator.checks.basic_constraints import (  # noqa
+    basic_constraints,
+)
+from spid_compliant_certificates.validator.checks.certificate_policies import (  # noqa
+    certificate_policies,
+)
+from spid_compliant_certificates.validator.checks.digest_algorithm import (  # noqa
+    digest_algorithm,
+)
+from spid_compliant_certificates.validator.checks.key_type_and_size import (  # noqa
+    key_type_and_size,
+)
+from spid_compliant_certificates.validator.checks.key_usage import (  # noqa
+    key_usage,
+)
+from spid_compliant_certificates.validator.checks.subject_dn import (  # noqa
+    ipa_code,
+    subject_dn,
+)
+from spid_compliant_certificates.validator.checks.time_validity import (  # noqa
+    not_expired,
+)
 
 _all_ = [
     'basic_constraints',
     'certificate_policies',
     'digest_algorithm',
+    'ipa_code',
     'key_type_and_size',
     'key_usage',
     'subject_dn',
@@ -22,31 +22,34 @@ from typing import Any, List, Tuple
 
 from cryptography import x509
 
+from spid_compliant_certificates.validator.certificate import ParsedCertificate
+from spid_compliant_certificates.validator.report import Message
+
 SUCCESS = True
 FAILURE = not SUCCESS
 
+_EXT_NAME = x509.BasicConstraints.oid._name
+
+_PRESENT_MSG = Message('basic_constraints.present',
+                       f'{_EXT_NAME} must be present')
+_CRITICAL_MSG = Message('basic_constraints.critical',
+                        f'{_EXT_NAME} must be not critical')
+_CA_MSG = Message('basic_constraints.ca',
+                  'CA extension property must be FALSE')
+
 
-def basic_constraints(extensions: x509.Extensions) -> List[Tuple[bool, str, Any]]:  # noqa
+def basic_constraints(pc: ParsedCertificate) -> List[Tuple[bool, str, Any]]:  # noqa
     checks = []
     # basicConstraints: CA:FALSE
-    ext_cls = x509.BasicConstraints
-    ext_name = ext_cls.oid._name
-
-    try:
-        ext = extensions.get_extension_for_class(ext_cls)
-
-        msg = f'{ext_name} must be not critical'
-        res = FAILURE if ext.critical else SUCCESS
-        checks.append((res, msg, ext.critical))
-
-        msg = 'CA extension property must be FALSE'
-        res = FAILURE if ext.value.ca else SUCCESS
-        checks.append((res, msg, ext.value.ca))
-    except x509.ExtensionNotFound:
-        msg = f'{ext_name} must be present'
-        checks.append((FAILURE, msg, None))
-    except ValueError:
-        msg = f'{ext_name} must be present'
-        checks.append((FAILURE, msg, None))
+    ext = pc.get_extension(x509.BasicConstraints)
+    if ext is None:
+        checks.append((FAILURE, _PRESENT_MSG, None))
+        return checks
+
+    res = FAILURE if ext.critical else SUCCESS
+    checks.append((res, _CRITICAL_MSG, ext.critical))
+
+    res = FAILURE if ext.value.ca else SUCCESS
+    checks.append((res, _CA_MSG, ext.value.ca))
 
     return checks
@@ -22,96 +22,117 @@ from typing import Any, List, Tuple
 
 from cryptography import x509
 
+from spid_compliant_certificates.validator.certificate import ParsedCertificate
+from spid_compliant_certificates.validator.report import Message
+
 SUCCESS = True
 FAILURE = not SUCCESS
 
+# expected policies, by sector
+EXPECTED_POLICIES = {
+    'private': (
+        '1.3.76.16.6',  # agIDCert
+        '1.3.76.16.4.3.1',  # spid-private-sp
+    ),
+    'public': (
+        '1.3.76.16.6',  # agIDCert
+        '1.3.76.16.4.2.1',  # spid-public-sp
+    ),
+}
+
+_EXT_NAME = x509.CertificatePolicies.oid._name
+
+_PRESENT_MSG = Message('certificate_policies.present',
+                       f'{_EXT_NAME} must be present')
+_CRITICAL_MSG = Message('certificate_policies.critical',
+                        f'{_EXT_NAME} must be not critical')
+
+
+def _policy_msg(ep: str) -> Message:
+    return Message(f'certificate_policies.{ep}',
+                   f'policy {ep} must be present')
+
+
+_POLICY_MSGS = {
+    sector: tuple((ep, _policy_msg(ep)) for ep in policies)
+    for sector, policies in EXPECTED_POLICIES.items()
+}
+
 
-def certificate_policies(extensions: x509.Extensions, sector: str) -> List[Tuple[bool, str, Any]]:  # noqa
+def certificate_policies(pc: ParsedCertificate, sector: str) -> List[Tuple[bool, str, Any]]:  # noqa
     checks = []
 
     # certificatePolicies: agIDcert(agIDcert)
     ext_cls = x509.CertificatePolicies
-    ext_name = ext_cls.oid._name
 
     # expected policies
-    exp_policies = [
-        '1.3.76.16.6'  # agIDCert
-    ]
-
-    if sector == 'private':
-        exp_policies.append('1.3.76.16.4.3.1')  # spid-private-sp
-
-    if sector == 'public':
-        exp_policies.append('1.3.76.16.4.2.1')  # spid-public-sp
-
-    try:
-        ext = extensions.get_extension_for_class(ext_cls)
-
-        # check if critical
-        msg = f'{ext_name} must be not critical'
-        res = FAILURE if ext.critical else SUCCESS
-        checks.append((res, msg, ext.critical))
-
-        # check if expected policies are present
-        policies = ext.value
-        for ep in exp_policies:
-            is_present = any(
-                p.policy_identifier.dotted_string == ep for p in policies
-            )
-            msg = f'policy {ep} must be present'
-            res = SUCCESS if is_present else FAILURE
-            checks.append((res, msg, is_present))
-
-        # # check the content of the policies
-        # for p in policies:
-        #     oid = p.policy_identifier.dotted_string
-        #     if oid == '1.3.76.16.6':
-        #         for q in p.policy_qualifiers:
-        #             if isinstance(q, x509.extensions.UserNotice):
-        #                 exp_etext = 'agIDcert'
-        #                 etext = q.explicit_text
-
-        #                 msg = f'policy {oid} must have '
-        #                 msg += f'UserNotice.ExplicitText={exp_etext}'  # noqa
-
-        #                 res = FAILURE if etext != exp_etext else SUCCESS
-        #                 checks.append((res, msg, etext))
-
-        #     if sector == 'public' and oid == '1.3.76.16.4.2.1':
-        #         for q in p.policy_qualifiers:
-        #             if isinstance(q, x509.extensions.UserNotice):
-        #                 exp_etext = 'cert_SP_Pub'
-        #                 etext = q.explicit_text
-
-        #                 msg = f'policy {oid} must have '
-        #                 msg += f'UserNotice.ExplicitText={exp_etext}'  # noqa
-
-        #                 res = FAILURE if etext != exp_etext else SUCCESS
-        #                 checks.append((res, msg, etext))
-        #     if sector == 'private' and oid == '1.3.76.16.4.3.1':
-        #         _qualifiers = p.policy_qualifiers or []
-        #         msg = f'policy {oid} must have '
-        #         for q in _qualifiers:
-        #             if isinstance(q, x509.extensions.UserNotice):
-        #                 exp_etext = 'cert_SP_Priv'
-        #                 etext = q.explicit_text
-
-        #                 msg += f'UserNotice.ExplicitText={exp_etext}'  # noqa
-
-        #                 res = FAILURE if etext != exp_etext else SUCCESS
-        #                 checks.append((res, msg, etext))
-
-        #         if not _qualifiers:
-        #             checks.append(
-        #                 (
-        #                     FAILURE,
-        #                     f'policy {oid} must have a valid policy',
-        #                     ""
-        #                 )
-        #             )
-
-    except x509.ExtensionNotFound as e:
-        msg = f'{ext_name} must be present'
-        checks.append((FAILURE, msg, str(e)))
+    exp_policies = _POLICY_MSGS.get(sector, (
+        ('1.3.76.16.6', _policy_msg('1.3.76.16.6')),
+    ))
+
+    ext = pc.get_extension(ext_cls)
+    if ext is None:
+        val = f'No {ext_cls.oid} extension was found'
+        checks.append((FAILURE, _PRESENT_MSG, val))
+        return checks
+
+    # check if critical
+    res = FAILURE if ext.critical else SUCCESS
+    checks.append((res, _CRITICAL_MSG, ext.critical))
+
+    # check if expected policies are present
+    policies = {p.policy_identifier.dotted_string for p in ext.value}
+    for ep, msg in exp_policies:
+        is_present = ep in policies
+        res = SUCCESS if is_present else FAILURE
+        checks.append((res, msg, is_present))
+
+    # # check the content of the policies
+    # for p in ext.value:
+    #     oid = p.policy_identifier.dotted_string
+    #     if oid == '1.3.76.16.6':
+    #         for q in p.policy_qualifiers:
+    #             if isinstance(q, x509.extensions.UserNotice):
+    #                 exp_etext = 'agIDcert'
+    #                 etext = q.explicit_text
+
+    #                 msg = f'policy {oid} must have '
+    #                 msg += f'UserNotice.ExplicitText={exp_etext}'  # noqa
+
+    #                 res = FAILURE if etext != exp_etext else SUCCESS
+    #                 checks.append((res, msg, etext))
+
+    #     if sector == 'public' and oid == '1.3.76.16.4.2.1':
+    #         for q in p.policy_qualifiers:
+    #             if isinstance(q, x509.extensions.UserNotice):
+    #                 exp_etext = 'cert_SP_Pub'
+    #                 etext = q.explicit_text
+
+    #                 msg = f'policy {oid} must have '
+    #                 msg += f'UserNotice.ExplicitText={exp_etext}'  # noqa
+
+    #                 res = FAILURE if etext != exp_etext else SUCCESS
+    #                 checks.append((res, msg, etext))
+    #     if sector == 'private' and oid == '1.3.76.16.4.3.1':
+    #         _qualifiers = p.policy_qualifiers or []
+    #         msg = f'policy {oid} must have '
+    #         for q in _qualifiers:
+    #             if isinstance(q, x509.extensions.UserNotice):
+    #                 exp_etext = 'cert_SP_Priv'
+    #                 etext = q.explicit_text
+
+    #                 msg += f'UserNotice.ExplicitText={exp_etext}'  # noqa
+
+    #                 res = FAILURE if etext != exp_etext else SUCCESS
+    #                 checks.append((res, msg, etext))
+
+    #         if not _qualifiers:
+    #             checks.append(
+    #                 (
+    #                     FAILURE,
+    #                     f'policy {oid} must have a valid policy',
+    #                     ""
+    #                 )
+    #             )
 
     return checks
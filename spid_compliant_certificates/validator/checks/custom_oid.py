@@ -18,8 +18,7 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-from cryptography.hazmat._oid  import ObjectIdentifier
-
+from cryptography.hazmat._oid import ObjectIdentifier
 
 OID_INITIALS = ObjectIdentifier('2.5.4.43')
 OID_NAME = ObjectIdentifier('2.5.4.41')
@@ -22,6 +22,8 @@ from typing import Any, List, Tuple
 
 from cryptography.hazmat.primitives import hashes
 
+from spid_compliant_certificates.validator.report import Message
+
 SUCCESS = True
 FAILURE = not SUCCESS
 
@@ -30,12 +32,18 @@ ALLOWED_ALGS = [
     hashes.SHA512.name,
 ]
 
+_ALLOWED_ALGS_MSG = Message(
+    'digest_algorithm.allowed',
+    f'The digest algorithm must be one of {ALLOWED_ALGS}'
+)
+_ALLOWED_ALGS_SET = frozenset(ALLOWED_ALGS)
+
 
 def digest_algorithm(alg: str) -> List[Tuple[bool, str, Any]]:
     checks = []
 
-    msg = f'The digest algorithm must be one of {ALLOWED_ALGS}'
-    res = FAILURE if alg not in ALLOWED_ALGS else SUCCESS
+    msg = _ALLOWED_ALGS_MSG
+    res = FAILURE if alg not in _ALLOWED_ALGS_SET else SUCCESS
     checks.append((res, msg, alg))
 
     return checks
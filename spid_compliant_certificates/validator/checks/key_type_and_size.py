@@ -20,9 +20,11 @@
 
 from typing import Any, List, Tuple
 
-from cryptography import x509
 from cryptography.hazmat.primitives.asymmetric import rsa
 
+from spid_compliant_certificates.validator.certificate import ParsedCertificate
+from spid_compliant_certificates.validator.report import Message
+
 SUCCESS = True
 FAILURE = not SUCCESS
 
@@ -32,30 +34,39 @@ ALLOWED_SIZES = [
     4096,
 ]
 
+MIN_SIZE = 2048
+
+_PK_TYPE_MSG = Message('key_type_and_size.type', 'The keypair must be RSA')
+_MIN_SIZE_MSG = Message(
+    'key_type_and_size.min_size',
+    f'The key size must be greater than or equal to {MIN_SIZE}'
+)
+_ALLOWED_SIZES_MSG = Message(
+    'key_type_and_size.allowed_size',
+    f'The key size must be one of {ALLOWED_SIZES}'
+)
+_ALLOWED_SIZES_SET = frozenset(ALLOWED_SIZES)
+
 
-def key_type_and_size(cert: x509.Certificate) -> List[Tuple[bool, str, Any]]:
+def key_type_and_size(pc: ParsedCertificate) -> List[Tuple[bool, str, Any]]:  # noqa
     checks = []
 
     # get the public key
-    pk = cert.public_key()
+    pk = pc.public_key
 
     # check the keypair type
     exp_pk_type = 'RSA'
     pk_type = 'RSA' if isinstance(pk, rsa.RSAPublicKey) else 'NOT ALLOWED'
-    msg = f'The keypair must be {exp_pk_type}'
     res = FAILURE if pk_type != exp_pk_type else SUCCESS
-    checks.append((res, msg, pk_type))
+    checks.append((res, _PK_TYPE_MSG, pk_type))
 
     # check the key size
-    min_size = 2048
     size = pk.key_size
 
-    msg = f'The key size must be greater than or equal to {min_size}'
-    res = FAILURE if size < min_size else SUCCESS
-    checks.append((res, msg, size))
+    res = FAILURE if size < MIN_SIZE else SUCCESS
+    checks.append((res, _MIN_SIZE_MSG, size))
 
-    msg = f'The key size must be one of {ALLOWED_SIZES}'
-    res = FAILURE if size not in ALLOWED_SIZES else SUCCESS
-    checks.append((res, msg, size))
+    res = FAILURE if size not in _ALLOWED_SIZES_SET else SUCCESS
+    checks.append((res, _ALLOWED_SIZES_MSG, size))
 
     return checks
@@ -23,39 +23,53 @@ from typing import Any, List, Tuple
 
 from cryptography import x509
 
+from spid_compliant_certificates.validator.certificate import ParsedCertificate
+from spid_compliant_certificates.validator.report import Message
+
 SUCCESS = True
 FAILURE = not SUCCESS
 
+_EXT_NAME = x509.KeyUsage.oid._name
+
+_PRESENT_MSG = Message('key_usage.present', f'{_EXT_NAME} must be present')
+_CRITICAL_MSG = Message('key_usage.critical', f'{_EXT_NAME} must be critical')
+
+_SET_USAGES = tuple(
+    (usage, Message(f'key_usage.{usage}', f'{usage} bit must be set'))
+    for usage in ['content_commitment', 'digital_signature']
+)
+
+_UNSET_USAGES = tuple(
+    (usage, Message(f'key_usage.{usage}', f'{usage} bit must be unset'))
+    for usage in ['crl_sign', 'data_encipherment', 'key_agreement',
+                  'key_cert_sign', 'key_encipherment']
+)
+
 
-def key_usage(extensions: x509.Extensions) -> List[Tuple[bool, str, Any]]:
+def key_usage(pc: ParsedCertificate) -> List[Tuple[bool, str, Any]]:
     checks = []
 
     # keyUsage: critical;nonRepudiation
     ext_cls = x509.KeyUsage
-    ext_name = ext_cls.oid._name
-
-    try:
-        ext = extensions.get_extension_for_class(ext_cls)
-
-        msg = f'{ext_name} must be critical'
-        res = SUCCESS if ext.critical else FAILURE
-        checks.append((res, msg, ext.critical))
-
-        for usage in ['content_commitment', 'digital_signature']:
-            msg = f'{usage} bit must be set'
-            val = getattr(ext.value, usage)
-            res = SUCCESS if val else FAILURE
-            checks.append((res, msg, val))
-
-        for usage in ['crl_sign', 'data_encipherment', 'key_agreement',
-                      'key_cert_sign', 'key_encipherment']:
-            msg = f'{usage} bit must be unset'
-            val = getattr(ext.value, usage)
-            res = SUCCESS if not val else FAILURE
-            checks.append((res, msg, val))
-    except x509.ExtensionNotFound as e:
-        msg = f'{ext_name} must be present'
+
+    ext = pc.get_extension(ext_cls)
+    if ext is None:
         res = FAILURE
-        checks.append((res, msg, str(e)))
+        val = f'No {ext_cls.oid} extension was found'
+        checks.append((res, _PRESENT_MSG, val))
+        return checks
+
+    res = SUCCESS if ext.critical else FAILURE
+    checks.append((res, _CRITICAL_MSG, ext.critical))
+
+    for usage, msg in _SET_USAGES:
+        val = getattr(ext.value, usage)
+        res = SUCCESS if val else FAILURE
+        checks.append((res, msg, val))
+
+    for usage, msg in _UNSET_USAGES:
+        val = getattr(ext.value, usage)
+        res = SUCCESS if not val else FAILURE
+        checks.append((res, msg, val))
 
     return checks
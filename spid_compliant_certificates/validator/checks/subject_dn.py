@@ -19,17 +19,21 @@
 # SOFTWARE.
 
 import re
+from functools import lru_cache
 from typing import Any, List, Tuple
 
 from cryptography import x509
 from iso3166 import Country, countries
 
+from spid_compliant_certificates.commons.ipa_index import IPAIndex
+from spid_compliant_certificates.validator.certificate import ParsedCertificate
 from spid_compliant_certificates.validator.checks.custom_oid import (
     OID_INITIALS,
     OID_NAME,
     OID_ORGANIZATION_IDENTIFIER,
     OID_URI,
 )
+from spid_compliant_certificates.validator.report import Message
 
 SUCCESS = True
 FAILURE = not SUCCESS
@@ -55,49 +59,94 @@ NOT_ALLOWED_ATTRS = [
 PUB_SECTOR_PATTERN = r'^PA:IT-\S{1,16}$'
 PRI_SECTOR_PATTERN = r'^(CF:IT-[a-zA-Z0-9]{16}|VATIT-\d{11})$'
 
+# compiled once per process
+SECTOR_PATTERNS = {
+    'public': re.compile(PUB_SECTOR_PATTERN),
+    'private': re.compile(PRI_SECTOR_PATTERN),
+}
+
+_NOT_ALLOWED_MSGS = tuple(
+    (attr, Message(f'subject_dn.not_allowed.{attr.dotted_string}',
+                   'SubjectDN must not contain {}  attribute [{}]',
+                   attr._name, attr.dotted_string))
+    for attr in NOT_ALLOWED_ATTRS
+)
+
+_MANDATORY_MSGS = tuple(
+    (attr, Message(f'subject_dn.mandatory.{attr.dotted_string}',
+                   'SubjectDN must contain name attribute [{}, {}]',
+                   attr._name, attr.dotted_string))
+    for attr in MANDATORY_ATTRS
+)
+
+
+@lru_cache(maxsize=None)
+def _value_msg(oid: x509.ObjectIdentifier) -> Message:
+    return Message(f'subject_dn.value.{oid.dotted_string}',
+                   'Name attribute [{}, {}] must have a value',
+                   oid._name, oid.dotted_string)
+
+
+@lru_cache(maxsize=None)
+def _pattern_msg(oid: x509.ObjectIdentifier, pattern: str) -> Message:
+    return Message('subject_dn.organization_identifier',
+                   'Value for name attribute [{}, {}] must match {}',
+                   oid._name, oid.dotted_string, pattern)
+
+
+@lru_cache(maxsize=None)
+def _ipa_code_msg(oid: x509.ObjectIdentifier) -> Message:
+    return Message('subject_dn.ipa_code',
+                   'IPA code in name attribute [{}, {}] must be registered',
+                   oid._name, oid.dotted_string)
+
 
-def subject_dn(subj: x509.Name, sector: str) -> List[Tuple[bool, str, Any]]:
+@lru_cache(maxsize=None)
+def _country_msg(oid: x509.ObjectIdentifier) -> Message:
+    return Message('subject_dn.country',
+                   'Value for name attribute [{}, {}] must be a valid country code',  # noqa
+                   oid._name, oid.dotted_string)
+
+
+def subject_dn(pc: ParsedCertificate, sector: str) -> List[Tuple[bool, str, Any]]:  # noqa
     checks = []
-    subj_attrs = [attr.oid for attr in subj]
+    subj_attrs = pc.subject_oids
 
     # check if not allowed attrs are present
-    for attr in NOT_ALLOWED_ATTRS:
-        msg = f'SubjectDN must not contain {attr._name}  attribute [{attr.dotted_string}]'  # noqa
+    for attr, msg in _NOT_ALLOWED_MSGS:
         val = attr not in subj_attrs
         res = SUCCESS if val else FAILURE
         checks.append((res, msg, val))
 
     # check if all the mandatory attre are present
-    for attr in MANDATORY_ATTRS:
-        msg = f'SubjectDN must contain name attribute [{attr._name}, {attr.dotted_string}]'  # noqa
+    for attr, msg in _MANDATORY_MSGS:
         val = attr in subj_attrs
         res = SUCCESS if val else FAILURE
         checks.append((res, msg, val))
 
     # check the name attribute value
-    for attr in subj:
-        msg = f'Name attribute [{attr.oid._name}, {attr.oid.dotted_string}] must have a value'  # noqa
+    for attr in pc.subject_attrs:
         value = attr.value
         res = SUCCESS if value else FAILURE
-        checks.append((res, msg, value))
+        checks.append((res, _value_msg(attr.oid), value))
 
-        pattern = f"a valid pattern, {PUB_SECTOR_PATTERN} or {PRI_SECTOR_PATTERN}"
         if attr.oid == OID_ORGANIZATION_IDENTIFIER:
-            if sector.lower() == 'public':
-                pattern = PUB_SECTOR_PATTERN
-            elif sector.lower() == 'private':
-                pattern = PRI_SECTOR_PATTERN
-            else:
-                msg = f'Invalid sector ({sector})'
+            regex = SECTOR_PATTERNS.get(sector.lower())
+            if regex is None:
+                msg = Message('subject_dn.sector', 'Invalid sector ({})',
+                              sector)
                 res = FAILURE
                 checks.append((res, msg, sector))
+                pattern = f"a valid pattern, {PUB_SECTOR_PATTERN} or {PRI_SECTOR_PATTERN}"  # noqa
+                res = FAILURE
+            else:
+                pattern = regex.pattern
+                res = SUCCESS if regex.match(value) else FAILURE
 
-            msg = f'Value for name attribute [{attr.oid._name}, {attr.oid.dotted_string}] must match {pattern}'  # noqa
-            res = SUCCESS if re.match(pattern, value) else FAILURE
-            checks.append((res, msg, value))
+            checks.append((res, _pattern_msg(attr.oid, pattern), value))
 
         if attr.oid == x509.OID_COUNTRY_NAME:
-            msg = f'Value for name attribute [{attr.oid._name}, {attr.oid.dotted_string}] must be a valid country code'  # noqa
+            msg = _country_msg(attr.oid)
             try:
                 res = SUCCESS if isinstance(countries.get(value), Country) else FAILURE  # noqa
                 checks.append((res, msg, value))
@@ -106,3 +155,17 @@ def subject_dn(subj: x509.Name, sector: str) -> List[Tuple[bool, str, Any]]:
                 checks.append((res, msg, str(e)))
 
     return checks
+
+
+def ipa_code(pc: ParsedCertificate, index: IPAIndex) -> List[Tuple[bool, str, Any]]:  # noqa
+    checks = []
+    for attr in pc.subject_attrs:
+        if attr.oid != OID_ORGANIZATION_IDENTIFIER:
+            continue
+        value = attr.value
+        # malformed values are already reported by subject_dn()
+        if not SECTOR_PATTERNS['public'].match(value):
+            continue
+        res = SUCCESS if index.exists(value[6:]) else FAILURE
+        checks.append((res, _ipa_code_msg(attr.oid), value))
+    return checks
@@ -1,15 +1,17 @@
 import datetime
-
-from cryptography import x509
 from typing import Any, List, Tuple
 
+from spid_compliant_certificates.validator.certificate import ParsedCertificate
+from spid_compliant_certificates.validator.report import Message
+
 
-def not_expired(cert: x509.Certificate) -> List[Tuple[bool, str, Any]]:
+def not_expired(pc: ParsedCertificate) -> List[Tuple[bool, str, Any]]:
     checks = []
 
-    msg = f"The Certificate expires in {cert.not_valid_after}"
+    msg = Message('not_expired.not_after', 'The Certificate expires in {}',
+                  pc.not_valid_after)
 
-    res = cert.not_valid_after > datetime.datetime.now()
-    checks.append((res, msg, cert.not_valid_after))
+    res = pc.not_valid_after > datetime.datetime.now()
+    checks.append((res, msg, pc.not_valid_after))
 
     return checks
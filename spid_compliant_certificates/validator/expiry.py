@@ -0,0 +1,206 @@
+# Copyright 2021 Paolo Smiraglia <paolo.smiraglia@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import datetime
+import pathlib
+import time
+from typing import (
+    TYPE_CHECKING,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes
+
+from spid_compliant_certificates.commons import logger
+from spid_compliant_certificates.validator.checks.custom_oid import (
+    OID_ORGANIZATION_IDENTIFIER,
+)
+from spid_compliant_certificates.validator.utils import iter_der
+
+if TYPE_CHECKING:
+    import sqlite3
+
+LOG = logger.LOG
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS certificates (
+    path TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    fingerprint TEXT NOT NULL,
+    not_after REAL NOT NULL,
+    common_name TEXT,
+    org_id TEXT,
+    PRIMARY KEY (path, position)
+);
+CREATE INDEX IF NOT EXISTS certificates_not_after
+    ON certificates (not_after);
+'''
+
+DAY = 24 * 3600
+
+
+class ExpiryRecord(NamedTuple):
+    not_after: datetime.datetime
+    fingerprint: str
+    common_name: Optional[str]
+    org_id: Optional[str]
+    target: str
+
+
+def _attr(crt: x509.Certificate, oid: x509.ObjectIdentifier) -> Optional[str]:
+    attrs = crt.subject.get_attributes_for_oid(oid)
+    return attrs[0].value if attrs else None
+
+
+def _rows(path: pathlib.Path) -> Iterator[Tuple]:
+    for i, der in enumerate(iter_der(path)):
+        try:
+            crt = x509.load_der_x509_certificate(der)
+        except ValueError:
+            # the validator reports broken certificates, skip them here
+            continue
+        not_after = crt.not_valid_after.replace(
+            tzinfo=datetime.timezone.utc
+        ).timestamp()
+        yield (str(path), i, crt.fingerprint(hashes.SHA256()).hex(),
+               not_after, _attr(crt, x509.OID_COMMON_NAME),
+               _attr(crt, OID_ORGANIZATION_IDENTIFIER))
+
+
+class ExpiryIndex(object):
+    # notAfter of every certificate found in the indexed files; files
+    # are parsed again only when their mtime or size change
+    def __init__(self, path: str = ':memory:'):
+        self.path = path
+        self._db = None
+
+    def _connect(self) -> 'sqlite3.Connection':
+        if self._db is None:
+            import sqlite3
+
+            self._db = sqlite3.connect(str(self.path), timeout=30)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.executescript(_SCHEMA)
+        return self._db
+
+    def update(self, crt_files: Iterable[pathlib.Path]) -> int:
+        db = self._connect()
+        known = dict(
+            (p, (m, s)) for p, m, s in
+            db.execute('SELECT path, mtime_ns, size FROM files')
+        )
+
+        updated = 0
+        with db:
+            for crt_file in crt_files:
+                path = pathlib.Path(crt_file).absolute()
+                try:
+                    st = path.stat()
+                except FileNotFoundError:
+                    self._forget(db, str(path))
+                    continue
+                if known.get(str(path)) == (st.st_mtime_ns, st.st_size):
+                    continue
+
+                # read before touching the index, one broken file must
+                # not roll back the whole update
+                try:
+                    rows = list(_rows(path))
+                except FileNotFoundError:
+                    self._forget(db, str(path))
+                    continue
+                except (OSError, ValueError) as e:
+                    LOG.warning('Skipping %s: %s', path, e)
+                    continue
+
+                self._forget(db, str(path))
+                db.executemany(
+                    'INSERT INTO certificates VALUES (?, ?, ?, ?, ?, ?)',
+                    rows
+                )
+                db.execute('INSERT INTO files VALUES (?, ?, ?)',
+                           (str(path), st.st_mtime_ns, st.st_size))
+                updated += 1
+        return updated
+
+    def update_dir(self, crt_dir: pathlib.Path, pattern: str = '*.pem') -> int:  # noqa
+        crt_dir = pathlib.Path(crt_dir).absolute()
+        if not crt_dir.is_dir():
+            emsg = f'Directory {crt_dir} not found'
+            raise ValueError(emsg)
+        crt_files = sorted(p for p in crt_dir.glob(pattern) if p.is_file())
+
+        # files indexed in a previous run and now gone
+        db = self._connect()
+        seen = {str(p) for p in crt_files}
+        prefix = str(crt_dir) + '/'
+        with db:
+            for (path,) in db.execute('SELECT path FROM files').fetchall():
+                if path.startswith(prefix) and path not in seen:
+                    self._forget(db, path)
+
+        return self.update(crt_files)
+
+    def _forget(self, db: 'sqlite3.Connection', path: str) -> None:
+        db.execute('DELETE FROM certificates WHERE path = ?', (path,))
+        db.execute('DELETE FROM files WHERE path = ?', (path,))
+
+    def _query(self, where: str, args: Tuple) -> List[ExpiryRecord]:
+        rows = self._connect().execute(
+            'SELECT not_after, fingerprint, common_name, org_id, path, '
+            + 'position FROM certificates '
+            + f'WHERE {where} ORDER BY not_after, path, position',
+            args
+        )
+        return [
+            ExpiryRecord(
+                datetime.datetime.fromtimestamp(na, datetime.timezone.utc),
+                fp, cn, org_id,
+                # same targets as the validation reports
+                f'{path}#{pos}' if pos else path
+            )
+            for na, fp, cn, org_id, path, pos in rows
+        ]
+
+    def expiring_within(self, days: float,
+                        now: Optional[float] = None) -> List[ExpiryRecord]:
+        now = time.time() if now is None else now
+        return self._query('not_after >= ? AND not_after < ?',
+                           (now, now + days * DAY))
+
+    def expired(self, now: Optional[float] = None) -> List[ExpiryRecord]:
+        now = time.time() if now is None else now
+        return self._query('not_after < ?', (now,))
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
@@ -0,0 +1,96 @@
+# Copyright 2021 Paolo Smiraglia <paolo.smiraglia@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import json
+import os
+import threading
+import time
+from typing import Dict, List, TextIO
+
+from spid_compliant_certificates.validator.report import Report, Test
+
+
+class ValidationHooks(object):
+    # callbacks invoked by validate(), override the ones you need; the
+    # finest grain is the test, as a rule computes all its checks at once;
+    # a report served from the cache gets the report hooks only
+
+    def pre_report(self, report: Report) -> None:
+        pass
+
+    def post_report(self, report: Report) -> None:
+        pass
+
+    def pre_test(self, test: Test) -> None:
+        pass
+
+    def post_test(self, test: Test) -> None:
+        pass
+
+
+class Profiler(ValidationHooks):
+    # attaches wall-clock and CPU durations to each Test and records
+    # spans that can be exported in the Trace Event Format
+    def __init__(self):
+        self.spans: List[Dict] = []
+        self._open: Dict[int, tuple] = {}
+
+    def _start(self, obj: object) -> None:
+        self._open[id(obj)] = (time.perf_counter_ns(), time.process_time_ns())
+
+    def _stop(self, obj: object) -> tuple:
+        wall0, cpu0 = self._open.pop(id(obj))
+        wall1, cpu1 = time.perf_counter_ns(), time.process_time_ns()
+        return wall0, wall1 - wall0, cpu1 - cpu0
+
+    def _span(self, name: str, cat: str, start: int, wall: int, cpu: int,
+              args: Dict) -> None:
+        self.spans.append({
+            'name': name,
+            'cat': cat,
+            'ph': 'X',
+            'ts': start / 1000,
+            'dur': wall / 1000,
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+            'args': dict(args, cpu_us=cpu / 1000),
+        })
+
+    def pre_report(self, report: Report) -> None:
+        self._start(report)
+
+    def post_report(self, report: Report) -> None:
+        start, wall, cpu = self._stop(report)
+        self._span(report.target, 'report', start, wall, cpu,
+                   {'result': report.result})
+
+    def pre_test(self, test: Test) -> None:
+        self._start(test)
+
+    def post_test(self, test: Test) -> None:
+        start, wall, cpu = self._stop(test)
+        test.timing = {'wall': wall / 1e9, 'cpu': cpu / 1e9}
+        self._span(test.id or test.description, 'test', start, wall, cpu,
+                   {'result': test.result, 'checks': len(test.checks)})
+
+    def export_trace(self, fp: TextIO) -> None:
+        # loadable by chrome://tracing and Perfetto
+        json.dump({'traceEvents': self.spans,
+                   'displayTimeUnit': 'ms'}, fp)
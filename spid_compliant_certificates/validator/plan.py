@@ -0,0 +1,175 @@
+# Copyright 2021 Paolo Smiraglia <paolo.smiraglia@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from functools import lru_cache, partial
+from typing import Any, Callable, List, NamedTuple, Optional, Tuple
+
+from spid_compliant_certificates import version
+from spid_compliant_certificates.commons.ipa_index import IPAIndex
+from spid_compliant_certificates.validator import checks
+from spid_compliant_certificates.validator.certificate import ParsedCertificate
+
+SECTORS = ('private', 'public')
+
+CheckFn = Callable[[ParsedCertificate, str], List[Tuple[bool, str, Any]]]
+
+
+class Rule(NamedTuple):
+    name: str
+    description: str
+    check: CheckFn
+    # the rule reads the x509 extensions
+    extension: bool = False
+    # sectors the rule applies to
+    sectors: Tuple[str, ...] = SECTORS
+    # relative cost, cheaper rules run first
+    cost: int = 1
+
+
+class Step(NamedTuple):
+    name: str
+    description: str
+    run: Callable[[ParsedCertificate], List[Tuple[bool, str, Any]]]
+    extension: bool
+
+
+class Plan(NamedTuple):
+    sector: str
+    steps: Tuple[Step, ...]
+
+
+_RULES: List[Rule] = []
+
+
+def register_rule(name: str, description: str, check: CheckFn,
+                  extension: bool = False,
+                  sectors: Tuple[str, ...] = SECTORS,
+                  cost: int = 1, replace: bool = False) -> None:
+    rule = Rule(name, description, check, extension, tuple(sectors), cost)
+    for i, r in enumerate(_RULES):
+        if r.name == name:
+            if not replace:
+                emsg = f'Rule {name} is already registered'
+                raise ValueError(emsg)
+            # keeps its place among the rules of the same cost
+            _RULES[i] = rule
+            break
+    else:
+        _RULES.append(rule)
+    compile_plan.cache_clear()
+
+
+def unregister_rule(name: str) -> None:
+    _RULES[:] = [r for r in _RULES if r.name != name]
+    compile_plan.cache_clear()
+
+
+def ruleset_version() -> str:
+    parts = [version] + [r.name for r in _RULES]
+    # the IPA code rule answers according to the index it was given
+    if _ipa_index is not None:
+        parts.append(f'ipa_index:{_ipa_index.version}')
+    return '+'.join(parts)
+
+
+@lru_cache(maxsize=None)
+def compile_plan(sector: str) -> Plan:
+    if sector not in SECTORS:
+        emsg = f'Invalid value for sector ({sector})'
+        raise ValueError(emsg)
+
+    # extension rules come last, a parsing error stops the plan there,
+    # then cheapest first (stable, ties keep the registration order)
+    rules = [r for r in _RULES if sector in r.sectors]
+    rules.sort(key=lambda r: (r.extension, r.cost))
+    steps = tuple(
+        Step(r.name, r.description, partial(r.check, sector=sector),
+             r.extension)
+        for r in rules
+    )
+    return Plan(sector, steps)
+
+
+# default rules, costs: 0 reads a parsed attribute, 1 compares a few
+# values, 2 walks a list, 3 matches regexes, 4 queries an index
+
+
+def _key_type_and_size(pc: ParsedCertificate, sector: str):
+    return checks.key_type_and_size(pc)
+
+
+def _digest_algorithm(pc: ParsedCertificate, sector: str):
+    return checks.digest_algorithm(pc.hash_algorithm)
+
+
+def _not_expired(pc: ParsedCertificate, sector: str):
+    return checks.not_expired(pc)
+
+
+def _basic_constraints(pc: ParsedCertificate, sector: str):
+    return checks.basic_constraints(pc)
+
+
+def _key_usage(pc: ParsedCertificate, sector: str):
+    return checks.key_usage(pc)
+
+
+register_rule('key_type_and_size', 'Checking the key type and size',
+              _key_type_and_size, cost=1)
+register_rule('digest_algorithm', 'Checking the signature digest algorithm',
+              _digest_algorithm, cost=0)
+register_rule('subject_dn', 'Checking the SubjectDN',
+              checks.subject_dn, cost=3)
+register_rule('not_expired', 'Checking that the certificates is not expired',
+              _not_expired, cost=0)
+register_rule('basic_constraints', 'Checking basicConstraints x509 extension',
+              _basic_constraints, extension=True, cost=1)
+register_rule('key_usage', 'Checking keyUsage x509 extension',
+              _key_usage, extension=True, cost=1)
+register_rule('certificate_policies',
+              'Checking certificatePolicies x509 extension',
+              checks.certificate_policies, extension=True, cost=2)
+
+
+def _ipa_code(pc: ParsedCertificate, sector: str, index: IPAIndex):
+    return checks.ipa_code(pc, index)
+
+
+_ipa_index: Optional[IPAIndex] = None
+
+
+def use_ipa_index(index: Optional[IPAIndex]) -> None:
+    # opt-in, the offline index is not shipped with the package; a new
+    # index replaces the current one, None drops the rule
+    global _ipa_index
+    if index is None:
+        unregister_rule('ipa_code')
+    else:
+        register_rule('ipa_code',
+                      'Checking the IPA code against the IPA index',
+                      partial(_ipa_code, index=index), sectors=('public',),
+                      cost=4, replace=True)
+    _ipa_index = index
+
+
+def get_ipa_index() -> Optional[IPAIndex]:
+    # handed to the worker processes, which do not inherit the rules
+    # registered at run time when they are spawned
+    return _ipa_index
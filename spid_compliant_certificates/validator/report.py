@@ -21,24 +21,59 @@
 import json
 import xml.etree.ElementTree as ET
 from datetime import datetime
-from typing import Any, Callable, Dict, Optional
-
-from ruamel.yaml import YAML
-from ruamel.yaml.compat import StringIO
+from typing import Any, Callable, Dict, Optional, Union
 
 SUCCESS = True
 FAILURE = not SUCCESS
 
 
+def _result(success: bool) -> str:
+    return 'success' if success else 'failure'
+
+
+class Message(object):
+    # a check message with a stable id, rendered only when needed
+    __slots__ = ('id', 'template', 'args')
+
+    def __init__(self, id: str, template: str, *args: Any):
+        self.id = id
+        self.template = template
+        self.args = args
+
+    def __str__(self) -> str:
+        if self.args:
+            return self.template.format(*self.args)
+        return self.template
+
+    def __repr__(self) -> str:
+        return f'Message({self.id!r}, {str(self)!r})'
+
+
 class Check(object):
-    def __init__(self, description: str, result: str, value: Any):
-        self.description = description
-        self.result = result
+    __slots__ = ('id', '_description', 'success', 'value')
+
+    def __init__(self, description: Union[str, Message],
+                 result: Union[bool, str], value: Any,
+                 id: Optional[str] = None):
+        if id is None and isinstance(description, Message):
+            id = description.id
+        self.id = id
+        self._description = description
+        self.success = (result if isinstance(result, bool)
+                        else result == 'success')
         self.value = value
 
+    @property
+    def description(self) -> str:
+        return str(self._description)
+
+    @property
+    def result(self) -> str:
+        return _result(self.success)
+
     def as_dict(self) -> Dict:
         d = {}
-        for k in ['description', 'result', 'value']:
+        for k in ['id', 'description', 'result', 'value']:
             d[k] = getattr(self, k)
         return d
 
@@ -50,30 +85,45 @@ class Check(object):
 
     def as_xml(self) -> ET.Element:
         e = ET.Element('check')
-        for k in ['description', 'result', 'value']:
+        for k in ['id', 'description', 'result', 'value']:
             se = ET.SubElement(e, k)
             se.text = str(getattr(self, k))
         return e
 
     def is_success(self) -> bool:
-        return (True if self.result == 'success' else False)
+        return self.success
+
+    @classmethod
+    def from_dict(cls, d: Dict) -> 'Check':
+        return cls(d['description'], d['result'], d['value'], d.get('id'))
 
 
 class Test(object):
-    def __init__(self, description: str):
+    __slots__ = ('id', 'description', 'failures', 'checks', 'timing')
+
+    def __init__(self, description: str, id: Optional[str] = None):
+        self.id = id
         self.description = description
-        self.result = 'success'
+        self.failures = 0
         self.checks = []
+        # set by validator.hooks.Profiler
+        self.timing = None
+
+    @property
+    def result(self) -> str:
+        return _result(not self.failures)
 
     def add_check(self, check: Check) -> None:
-        if not check.is_success():
-            self.result = 'failure'
+        if not check.success:
+            self.failures += 1
         self.checks.append(check)
 
     def as_dict(self) -> Dict:
         d = {}
-        for k in ['description', 'result']:
+        for k in ['id', 'description', 'result']:
             d[k] = getattr(self, k)
+        if self.timing is not None:
+            d['timing'] = self.timing
         d['checks'] = [c.as_dict() for c in self.checks]
         return d
 
@@ -81,46 +131,78 @@ class Test(object):
         lines = []
         lines.append(f'Test: {self.description}')
         lines.append(f'Result: {self.result}')
+        if self.timing is not None:
+            lines.append(f'Timing: {self.timing}')
         for line in [f'  {c.as_txt(fmt)}' for c in self.checks]:
             lines.append(line)
         return '\n'.join(lines)
 
     def as_xml(self) -> ET.Element:
         e = ET.Element('test')
-        for k in ['description', 'result']:
+        for k in ['id', 'description', 'result']:
             se = ET.SubElement(e, k)
             se.text = str(getattr(self, k))
+        if self.timing is not None:
+            se = ET.SubElement(e, 'timing')
+            for k, v in self.timing.items():
+                ET.SubElement(se, k).text = str(v)
         se = ET.SubElement(e, 'checks')
         for c in [c.as_xml() for c in self.checks]:
             se.append(c)
         return e
 
     def is_success(self) -> bool:
-        return (True if self.result == 'success' else False)
+        return not self.failures
+
+    @classmethod
+    def from_dict(cls, d: Dict) -> 'Test':
+        t = cls(d['description'], d.get('id'))
+        t.timing = d.get('timing')
+        for c in d['checks']:
+            t.add_check(Check.from_dict(c))
+        return t
 
 
 class Report(object):
-    def __init__(self, target: str):
-        self.timestamp = datetime.now().strftime('%c')
-        self.result = 'success'
+    __slots__ = ('_timestamp', 'target', 'fingerprint', 'failures', 'tests')
+
+    def __init__(self, target: str, fingerprint: Optional[str] = None):
+        # formatted only when serialized
+        self._timestamp = datetime.now()
         self.target = target
+        self.fingerprint = fingerprint
+        self.failures = 0
         self.tests = []
 
+    @property
+    def timestamp(self) -> str:
+        if isinstance(self._timestamp, datetime):
+            return self._timestamp.strftime('%c')
+        return self._timestamp
+
+    @timestamp.setter
+    def timestamp(self, value: Union[datetime, str]) -> None:
+        self._timestamp = value
+
+    @property
+    def result(self) -> str:
+        return _result(not self.failures)
+
     def add_test(self, test: Test) -> None:
         if not test.is_success():
-            self.result = 'failure'
+            self.failures += 1
         self.tests.append(test)
 
     def as_dict(self) -> Dict:
         d = {}
-        for k in ['result', 'target', 'timestamp']:
+        for k in ['result', 'target', 'fingerprint', 'timestamp']:
             d[k] = getattr(self, k)
         d['tests'] = [t.as_dict() for t in self.tests]
         return d
 
     def as_xml(self) -> ET.Element:
         e = ET.Element('report')
-        for k in ['result', 'target', 'timestamp']:
+        for k in ['result', 'target', 'fingerprint', 'timestamp']:
             se = ET.SubElement(e, k)
             se.text = str(getattr(self, k))
         se = ET.SubElement(e, 'tests')
@@ -129,17 +211,68 @@ class Report(object):
         return e
 
     def is_success(self) -> bool:
-        return (True if self.result == 'success' else False)
+        return not self.failures
+
+    @classmethod
+    def from_dict(cls, d: Dict) -> 'Report':
+        r = cls(d['target'], d.get('fingerprint'))
+        r.timestamp = d['timestamp']
+        for t in d['tests']:
+            r.add_test(Test.from_dict(t))
+        return r
+
+
+class BatchReport(object):
+    __slots__ = ('timestamp', 'failures', 'reports')
+
+    def __init__(self):
+        self.timestamp = datetime.now().strftime('%c')
+        self.failures = 0
+        self.reports = []
+
+    @property
+    def result(self) -> str:
+        return _result(not self.failures)
+
+    def add_report(self, report: Report) -> None:
+        if not report.is_success():
+            self.failures += 1
+        self.reports.append(report)
+
+    def as_dict(self) -> Dict:
+        d = {}
+        for k in ['result', 'timestamp', 'failures']:
+            d[k] = getattr(self, k)
+        d['total'] = len(self.reports)
+        d['reports'] = [r.as_dict() for r in self.reports]
+        return d
+
+    def as_xml(self) -> ET.Element:
+        e = ET.Element('batch')
+        for k in ['result', 'timestamp', 'failures']:
+            se = ET.SubElement(e, k)
+            se.text = str(getattr(self, k))
+        se = ET.SubElement(e, 'total')
+        se.text = str(len(self.reports))
+        se = ET.SubElement(e, 'reports')
+        for r in [r.as_xml() for r in self.reports]:
+            se.append(r)
+        return e
+
+    def is_success(self) -> bool:
+        return not self.failures
 
 
 class ReportSerializer(object):
-    def serialize(self, report: Report, format: str) -> str:
+    def serialize(self, report: Union[Report, BatchReport], format: str) -> str:  # noqa
         serializer = self._get_serializer(format)
         return serializer(report)
 
     def _get_serializer(self, format: str) -> Callable[[Report], str]:
         if format == 'json':
             return self._json_serializer
+        elif format == 'jsonl':
+            return self._jsonl_serializer
         elif format == 'txt':
             return self._txt_serializer
         elif format == 'xml':
@@ -151,12 +284,34 @@ class ReportSerializer(object):
             raise ValueError(emsg)
 
     def _json_serializer(self, report: Report) -> str:
-        return json.dumps(report.as_dict())
+        # values such as notAfter are datetime objects
+        return json.dumps(report.as_dict(), default=str)
+
+    def _jsonl_serializer(self, report: Report) -> str:
+        # one line per report
+        reports = [report]
+        if isinstance(report, BatchReport):
+            reports = report.reports
+        return ''.join(
+            json.dumps(r.as_dict(), default=str) + '\n' for r in reports
+        )
 
     def _txt_serializer(self, report: Report) -> str:
+        if isinstance(report, BatchReport):
+            lines = []
+            lines.append(f'Result: {report.result}')
+            lines.append(f'Timestamp: {report.timestamp}')
+            lines.append(f'Total: {len(report.reports)}')
+            lines.append(f'Failures: {report.failures}')
+            for r in report.reports:
+                lines.append('')
+                lines.append(self._txt_serializer(r))
+            return '\n'.join(lines)
+
         lines = []
         lines.append(f'Result: {report.result}')
         lines.append(f'Target: {report.target}')
+        lines.append(f'Fingerprint: {report.fingerprint}')
         lines.append(f'Timestamp: {report.timestamp}')
         for _lines in [t.as_txt().split('\n') for t in report.tests]:
             for line in [f'  {_line}' for _line in _lines]:
@@ -168,10 +323,17 @@ class ReportSerializer(object):
         return ET.tostring(doc, encoding='unicode')
 
     def _yml_serializer(self, report: Report) -> str:
+        return self._yml_dump(report.as_dict())
+
+    def _yml_dump(self, d: Dict) -> str:
+        # ruamel.yaml is slow to import, pay for it only when needed
+        from ruamel.yaml import YAML
+        from ruamel.yaml.compat import StringIO
+
         buf = StringIO()
         yaml = YAML()
         yaml.default_flow_style = False
         yaml.line_break = False
         yaml.width = 256
-        yaml.dump(report.as_dict(), buf)
+        yaml.dump(d, buf)
         return buf.getvalue()
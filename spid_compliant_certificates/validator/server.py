@@ -0,0 +1,226 @@
+# Copyright 2021 Paolo Smiraglia <paolo.smiraglia@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from spid_compliant_certificates.commons import logger
+from spid_compliant_certificates.commons.ipa_index import IPAIndex
+from spid_compliant_certificates.validator.plan import (
+    SECTORS,
+    compile_plan,
+    get_ipa_index,
+    use_ipa_index,
+)
+from spid_compliant_certificates.validator.report import ReportSerializer
+from spid_compliant_certificates.validator.validate import validate_bytes
+
+LOG = logger.LOG
+
+CONTENT_TYPES = {
+    'json': 'application/json',
+    'jsonl': 'application/x-ndjson',
+    'txt': 'text/plain; charset=utf-8',
+    'xml': 'application/xml',
+    'yml': 'application/yaml',
+    'yaml': 'application/yaml',
+}
+
+REASONS = {
+    200: 'OK',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    408: 'Request Timeout',
+    411: 'Length Required',
+    413: 'Payload Too Large',
+    422: 'Unprocessable Entity',
+    500: 'Internal Server Error',
+    503: 'Service Unavailable',
+}
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _warm_up(ipa_index: Optional[IPAIndex] = None) -> None:
+    # spawned workers do not inherit the rules registered at run time
+    use_ipa_index(ipa_index)
+
+    # compile the plans once per worker, not once per request
+    for sector in SECTORS:
+        compile_plan(sector)
+
+    # the YAML serializer imports ruamel.yaml lazily
+    import ruamel.yaml  # noqa
+
+
+def validate_body(body: bytes, sector: str, format: str) -> Tuple[bool, str]:
+    rep = validate_bytes(body, sector, 'request')
+    return rep.is_success(), ReportSerializer().serialize(rep, format)
+
+
+class ValidationServer(object):
+    def __init__(self, workers: Optional[int] = None,
+                 max_concurrency: int = 16, max_pending: int = 64,
+                 max_body_size: int = 64 * 1024, timeout: float = 30.0):
+        self.workers = workers
+        self.max_concurrency = max_concurrency
+        self.max_pending = max(max_pending, max_concurrency)
+        self.max_body_size = max_body_size
+        self.timeout = timeout
+        self._executor = None
+        self._semaphore = None
+        self._pending = 0
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Tuple[str, str, Dict[str, str], bytes]:  # noqa
+        head = await asyncio.wait_for(
+            reader.readuntil(b'\r\n\r\n'), self.timeout
+        )
+        lines = head.decode('latin-1').split('\r\n')
+        try:
+            method, target, _ = lines[0].split(' ', 2)
+        except ValueError:
+            raise HTTPError(400, 'Malformed request line')
+
+        headers = {}
+        for line in lines[1:]:
+            if line:
+                k, _, v = line.partition(':')
+                headers[k.strip().lower()] = v.strip()
+
+        body = b''
+        if method == 'POST':
+            if 'content-length' not in headers:
+                raise HTTPError(411, 'Content-Length is required')
+            try:
+                length = int(headers['content-length'])
+            except ValueError:
+                raise HTTPError(400, 'Invalid Content-Length')
+            if length > self.max_body_size:
+                emsg = f'Body exceeds {self.max_body_size} bytes'
+                raise HTTPError(413, emsg)
+            body = await asyncio.wait_for(
+                reader.readexactly(length), self.timeout
+            )
+
+        return method, target, headers, body
+
+    async def _dispatch(self, method: str, target: str, body: bytes) -> Tuple[int, str, str]:  # noqa
+        url = urlsplit(target)
+        if url.path == '/health':
+            return 200, CONTENT_TYPES['txt'], 'ok'
+        if url.path != '/validate':
+            raise HTTPError(404, f'{url.path} not found')
+        if method != 'POST':
+            raise HTTPError(405, 'Use POST')
+
+        query = parse_qs(url.query)
+        sector = query.get('sector', ['public'])[0]
+        format = query.get('format', ['json'])[0]
+        if sector not in SECTORS:
+            raise HTTPError(400, f'Invalid value for sector ({sector})')
+        if format not in CONTENT_TYPES:
+            raise HTTPError(400, f'Format {format} is not accepted')
+
+        # back-pressure: refuse instead of queueing without bounds
+        if self._pending >= self.max_pending:
+            raise HTTPError(503, 'Too many pending requests')
+
+        self._pending += 1
+        try:
+            async with self._semaphore:
+                loop = asyncio.get_running_loop()
+                try:
+                    _, out = await loop.run_in_executor(
+                        self._executor, validate_body, body, sector, format
+                    )
+                except ValueError as e:
+                    raise HTTPError(422, str(e))
+        finally:
+            self._pending -= 1
+
+        return 200, CONTENT_TYPES[format], out
+
+    async def _handle(self, reader: asyncio.StreamReader,
+                      writer: asyncio.StreamWriter) -> None:
+        try:
+            method, target, _, body = await self._read_request(reader)
+            status, ctype, out = await self._dispatch(method, target, body)
+        except HTTPError as e:
+            status, ctype, out = e.status, CONTENT_TYPES['txt'], str(e)
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError):
+            status, ctype, out = 408, CONTENT_TYPES['txt'], 'Timeout'
+        except asyncio.LimitOverrunError:
+            status, ctype, out = 400, CONTENT_TYPES['txt'], 'Headers too large'
+        except Exception as e:
+            LOG.error(e)
+            status, ctype, out = 500, CONTENT_TYPES['txt'], str(e)
+
+        data = out.encode()
+        writer.write(
+            (f'HTTP/1.1 {status} {REASONS[status]}\r\n'
+             + f'Content-Type: {ctype}\r\n'
+             + f'Content-Length: {len(data)}\r\n'
+             + ('Retry-After: 1\r\n' if status == 503 else '')
+             + 'Connection: close\r\n\r\n').encode('latin-1') + data
+        )
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = '127.0.0.1', port: int = 8080,
+                    unix_socket: Optional[str] = None) -> None:
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        with ProcessPoolExecutor(max_workers=self.workers,
+                                 initializer=_warm_up,
+                                 initargs=(get_ipa_index(),)) as executor:
+            self._executor = executor
+            # forked workers are started on the first job: start them
+            # before accepting, or they would inherit the client sockets
+            # open at that time and hold the connections open
+            await asyncio.get_running_loop().run_in_executor(
+                executor, os.getpid
+            )
+
+            if unix_socket is not None:
+                server = await asyncio.start_unix_server(
+                    self._handle, path=unix_socket
+                )
+                LOG.info(f'Listening on unix:{unix_socket}')
+            else:
+                server = await asyncio.start_server(self._handle, host, port)
+                LOG.info(f'Listening on http://{host}:{port}')
+
+            async with server:
+                await server.serve_forever()
+
+
+def serve(host: str = '127.0.0.1', port: int = 8080,
+          unix_socket: Optional[str] = None, **kwargs) -> None:
+    server = ValidationServer(**kwargs)
+    asyncio.run(server.serve(host, port, unix_socket))
@@ -0,0 +1,244 @@
+# Copyright 2021 Paolo Smiraglia <paolo.smiraglia@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import json
+import time
+from datetime import datetime
+from typing import (
+    TYPE_CHECKING,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+from spid_compliant_certificates.validator.plan import ruleset_version
+from spid_compliant_certificates.validator.report import Check, Report, Test
+
+if TYPE_CHECKING:
+    import sqlite3
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS reports (
+    id INTEGER PRIMARY KEY,
+    fingerprint TEXT,
+    target TEXT NOT NULL,
+    sector TEXT NOT NULL,
+    ruleset TEXT NOT NULL,
+    result TEXT NOT NULL,
+    failures INTEGER NOT NULL,
+    timestamp REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS reports_fingerprint
+    ON reports (fingerprint, timestamp);
+CREATE INDEX IF NOT EXISTS reports_target
+    ON reports (target, timestamp);
+CREATE INDEX IF NOT EXISTS reports_sector_result
+    ON reports (sector, result, timestamp);
+CREATE INDEX IF NOT EXISTS reports_timestamp
+    ON reports (timestamp);
+
+CREATE TABLE IF NOT EXISTS tests (
+    report_id INTEGER NOT NULL REFERENCES reports (id),
+    position INTEGER NOT NULL,
+    test_id TEXT,
+    description TEXT NOT NULL,
+    result TEXT NOT NULL,
+    PRIMARY KEY (report_id, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS tests_test_id_result
+    ON tests (test_id, result, report_id);
+
+CREATE TABLE IF NOT EXISTS checks (
+    report_id INTEGER NOT NULL REFERENCES reports (id),
+    test_position INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    check_id TEXT,
+    description TEXT NOT NULL,
+    result TEXT NOT NULL,
+    value TEXT,
+    PRIMARY KEY (report_id, test_position, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS checks_check_id_result
+    ON checks (check_id, result, report_id);
+'''
+
+
+class StoredReport(NamedTuple):
+    id: int
+    fingerprint: Optional[str]
+    target: str
+    sector: str
+    result: str
+    failures: int
+    timestamp: datetime
+
+
+def _epoch(report: Report) -> float:
+    ts = report._timestamp
+    if isinstance(ts, datetime):
+        return ts.timestamp()
+    # reports coming from the cache carry the serialized timestamp
+    try:
+        return datetime.strptime(ts, '%c').timestamp()
+    except (TypeError, ValueError):
+        return time.time()
+
+
+def _epoch_of(when: Optional[datetime]) -> Optional[float]:
+    return None if when is None else when.timestamp()
+
+
+class ReportStore(object):
+    # reports are buffered and written `batch_size` at a time, each
+    # batch in a single transaction
+    def __init__(self, path: str, batch_size: int = 500):
+        self.path = path
+        self.batch_size = batch_size
+        self._pending: List[Tuple[Report, str]] = []
+        self._db = None
+
+    def __enter__(self) -> 'ReportStore':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _connect(self) -> 'sqlite3.Connection':
+        if self._db is None:
+            import sqlite3
+
+            self._db = sqlite3.connect(str(self.path), timeout=30)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute('PRAGMA synchronous=NORMAL')
+            self._db.executescript(_SCHEMA)
+        return self._db
+
+    def add(self, report: Report, sector: str) -> None:
+        self._pending.append((report, sector))
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def add_many(self, reports: Iterable[Report], sector: str) -> None:
+        for r in reports:
+            self.add(r, sector)
+        self.flush()
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        db = self._connect()
+        ruleset = ruleset_version()
+        tests, checks = [], []
+        with db:
+            for rep, sector in self._pending:
+                cur = db.execute(
+                    'INSERT INTO reports (fingerprint, target, sector, '
+                    + 'ruleset, result, failures, timestamp) '
+                    + 'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    (rep.fingerprint, rep.target, sector, ruleset,
+                     rep.result, rep.failures, _epoch(rep))
+                )
+                report_id = cur.lastrowid
+                for i, t in enumerate(rep.tests):
+                    tests.append((report_id, i, t.id, t.description,
+                                  t.result))
+                    for j, c in enumerate(t.checks):
+                        checks.append((report_id, i, j, c.id,
+                                       c.description, c.result,
+                                       json.dumps(c.value, default=str)))
+            db.executemany('INSERT INTO tests VALUES (?, ?, ?, ?, ?)', tests)
+            db.executemany('INSERT INTO checks VALUES (?, ?, ?, ?, ?, ?, ?)',
+                           checks)
+        self._pending = []
+
+    def _reports(self, sql: str, args: Tuple) -> List[StoredReport]:
+        self.flush()
+        rows = self._connect().execute(
+            'SELECT r.id, r.fingerprint, r.target, r.sector, r.result, '
+            + f'r.failures, r.timestamp FROM reports r {sql}',
+            args
+        )
+        return [StoredReport(*row[:6], datetime.fromtimestamp(row[6]))
+                for row in rows]
+
+    def failing(self, id: str, sector: Optional[str] = None,
+                since: Optional[datetime] = None,
+                until: Optional[datetime] = None) -> List[StoredReport]:
+        # id is either a test id (key_usage) or a check id
+        # (key_usage.critical)
+        table, column = (('checks', 'check_id') if '.' in id
+                         else ('tests', 'test_id'))
+        sql = (f'WHERE r.id IN (SELECT report_id FROM {table} '
+               + f"WHERE {column} = ? AND result = 'failure')")
+        args = [id]
+        for cond, value in [('r.sector = ?', sector),
+                            ('r.timestamp >= ?', _epoch_of(since)),
+                            ('r.timestamp < ?', _epoch_of(until))]:
+            if value is not None:
+                sql += f' AND {cond}'
+                args.append(value)
+        return self._reports(sql + ' ORDER BY r.timestamp', tuple(args))
+
+    def history(self, fingerprint: Optional[str] = None,
+                target: Optional[str] = None) -> List[StoredReport]:
+        if fingerprint is not None:
+            sql, args = 'WHERE r.fingerprint = ?', (fingerprint,)
+        elif target is not None:
+            sql, args = 'WHERE r.target = ?', (target,)
+        else:
+            emsg = 'Either fingerprint or target must be given'
+            raise ValueError(emsg)
+        return self._reports(sql + ' ORDER BY r.timestamp', args)
+
+    def load(self, report_id: int) -> Optional[Report]:
+        self.flush()
+        db = self._connect()
+        row = db.execute(
+            'SELECT target, fingerprint, timestamp FROM reports WHERE id = ?',
+            (report_id,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        rep = Report(row[0], row[1])
+        rep.timestamp = datetime.fromtimestamp(row[2])
+        tests: Dict[int, Test] = {}
+        for i, test_id, description in db.execute(
+                'SELECT position, test_id, description FROM tests '
+                + 'WHERE report_id = ? ORDER BY position', (report_id,)):
+            tests[i] = Test(description, test_id)
+        for i, check_id, description, result, value in db.execute(
+                'SELECT test_position, check_id, description, result, value '
+                + 'FROM checks WHERE report_id = ? '
+                + 'ORDER BY test_position, position', (report_id,)):
+            tests[i].add_check(Check(description, result, json.loads(value),
+                                     check_id))
+        for i in sorted(tests):
+            rep.add_test(tests[i])
+        return rep
+
+    def close(self) -> None:
+        self.flush()
+        if self._db is not None:
+            self._db.close()
+            self._db = None
@@ -18,10 +18,12 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-from spid_compliant_certificates.validator.test_cases.private_sector import \
-    TestPrivateSector  # noqa
-from spid_compliant_certificates.validator.test_cases.public_sector import \
-    TestPublicSector  # noqa
+from spid_compliant_certificates.validator.test_cases.private_sector import (  # noqa
+    TestPrivateSector,
+)
+from spid_compliant_certificates.validator.test_cases.public_sector import (  # noqa
+    TestPublicSector,
+)
 
 _all_ = [
     'TestPrivateSector',
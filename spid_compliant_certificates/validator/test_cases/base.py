@@ -20,56 +20,81 @@
 
 import os
 import unittest
+from functools import lru_cache
+from typing import Optional, Tuple
 
 from cryptography import x509
 
 from spid_compliant_certificates.validator import checks
-from spid_compliant_certificates.validator.utils import pem_to_der
+from spid_compliant_certificates.validator.certificate import ParsedCertificate
+from spid_compliant_certificates.validator.utils import iter_der
+
+
+@lru_cache(maxsize=1024)
+def _load(cert_file: str, index: int = 0) -> Tuple[Optional[ParsedCertificate], Optional[str]]:  # noqa
+    # shared by all the test cases targeting the same certificate
+    if not os.path.exists(cert_file):
+        return None, f'File at {cert_file} not found'
+    try:
+        for i, der in enumerate(iter_der(cert_file)):
+            if i == index:
+                try:
+                    crt = x509.load_der_x509_certificate(der)
+                except ValueError as e:
+                    return None, f'Certificate #{i} in {cert_file}: {e}'
+                return ParsedCertificate(crt), None
+    except (OSError, ValueError) as e:
+        return None, f'Unable to read {cert_file}: {e}'
+    return None, f'Certificate at {cert_file} must be a PEM'
 
 
 class TestBase(unittest.TestCase):
     sector = None
+    # default to the CERT_FILE environment variable
+    cert_file = None
+    # position of the certificate in a bundle
+    cert_index = 0
+
+    @classmethod
+    def setUpClass(cls):
+        # parsed once per class, not once per test method
+        cert_file = cls.cert_file or os.getenv('CERT_FILE', 'crt.pem')
+        cls.pc, cls.load_error = _load(str(cert_file), cls.cert_index)
+        cls.cert = cls.pc.crt if cls.pc is not None else None
 
     def setUp(self):
-        der, msg = pem_to_der(os.getenv('CERT_FILE', 'crt.pem'))
-        if der:
-            self.cert = x509.load_der_x509_certificate(der)
-        else:
-            self.fail(msg)
+        if self.pc is None:
+            self.fail(self.load_error)
 
     def test_key_type_and_size(self):
-        _checks = checks.key_type_and_size(self.cert)
+        _checks = checks.key_type_and_size(self.pc)
         for res, msg, val in _checks:
             self.assertTrue(res, msg=f'{msg} ({val})')
 
     def test_digest_algorithm(self):
-        alg = self.cert.signature_hash_algorithm.name
+        alg = self.pc.hash_algorithm
         _checks = checks.digest_algorithm(alg)
         for res, msg, val in _checks:
             self.assertTrue(res, msg=f'{msg} ({val})')
 
     def test_basic_constraints(self):
-        extensions = self.cert.extensions
-        _checks = checks.basic_constraints(extensions)
+        _checks = checks.basic_constraints(self.pc)
         for res, msg, val in _checks:
             self.assertTrue(res, msg=f'{msg} ({val})')
 
     def test_key_usage(self):
-        extensions = self.cert.extensions
-        _checks = checks.key_usage(extensions)
+        _checks = checks.key_usage(self.pc)
         for res, msg, val in _checks:
             self.assertTrue(res, msg=f'{msg} ({val})')
 
     def test_certificate_policies(self):
-        extensions = self.cert.extensions
         sector = self.sector
-        _checks = checks.certificate_policies(extensions, sector)
+        _checks = checks.certificate_policies(self.pc, sector)
         for res, msg, val in _checks:
             self.assertTrue(res, msg=f'{msg} ({val})')
 
     def test_subject_dn(self):
-        subj = self.cert.subject
         sector = self.sector
-        _checks = checks.subject_dn(subj, sector)
+        _checks = checks.subject_dn(self.pc, sector)
         for res, msg, val in _checks:
             self.assertTrue(res, msg=f'{msg} ({val})')
@@ -0,0 +1,106 @@
+# Copyright 2021 Paolo Smiraglia <paolo.smiraglia@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os
+import pathlib
+import re
+import unittest
+from typing import Dict, Iterable, List, Tuple, Type
+
+from spid_compliant_certificates.validator.test_cases.base import TestBase
+from spid_compliant_certificates.validator.test_cases.private_sector import (
+    TestPrivateSector,
+)
+from spid_compliant_certificates.validator.test_cases.public_sector import (
+    TestPublicSector,
+)
+from spid_compliant_certificates.validator.utils import iter_der
+
+TEST_CASES = {
+    'private': TestPrivateSector,
+    'public': TestPublicSector,
+}
+
+
+def find_targets(crt_files: Iterable[pathlib.Path]) -> List[Tuple[str, int]]:  # noqa
+    # one target per certificate, bundles included
+    targets = []
+    for crt_file in crt_files:
+        try:
+            count = sum(1 for _ in iter_der(crt_file))
+        except (OSError, ValueError):
+            count = 0
+        # missing or unreadable files still get a target, their tests
+        # report the loading error
+        for i in range(max(count, 1)):
+            targets.append((str(crt_file), i))
+    return targets
+
+
+def make_test_case(test_class: Type[TestBase], cert_file: str,
+                   cert_index: int = 0) -> Type[TestBase]:
+    stem = re.sub(r'\W+', '_', pathlib.Path(cert_file).stem)
+    name = f'{test_class.__name__}_{stem}'
+    if cert_index:
+        name += f'_{cert_index}'
+    return type(name, (test_class,), {
+        'cert_file': cert_file,
+        'cert_index': cert_index,
+        '__module__': test_class.__module__,
+    })
+
+
+def make_test_cases(test_class: Type[TestBase],
+                    crt_files: Iterable[pathlib.Path]) -> Dict[str, Type[TestBase]]:  # noqa
+    # meant for globals().update(...) in a test module, so that pytest
+    # (and pytest-xdist) can collect the generated classes
+    classes = {}
+    for cert_file, cert_index in find_targets(crt_files):
+        cls = make_test_case(test_class, cert_file, cert_index)
+        name, n = cls.__name__, 1
+        while name in classes:
+            n += 1
+            name = f'{cls.__name__}_{n}'
+        cls.__name__ = cls.__qualname__ = name
+        classes[name] = cls
+    return classes
+
+
+def crt_files_from_env() -> List[pathlib.Path]:
+    crt_dir = os.getenv('CERT_DIR')
+    if crt_dir is not None:
+        pattern = os.getenv('CERT_GLOB', '*.pem')
+        return sorted(p for p in pathlib.Path(crt_dir).glob(pattern)
+                      if p.is_file())
+    return [pathlib.Path(os.getenv('CERT_FILE', 'crt.pem'))]
+
+
+def load_tests(loader: unittest.TestLoader, tests, pattern):
+    # python -m unittest spid_compliant_certificates.validator.test_cases.fleet  # noqa
+    sector = os.getenv('CERT_SECTOR', 'public')
+    if sector not in TEST_CASES:
+        emsg = f'Invalid value for sector ({sector})'
+        raise ValueError(emsg)
+
+    suite = unittest.TestSuite()
+    classes = make_test_cases(TEST_CASES[sector], crt_files_from_env())
+    for cls in classes.values():
+        suite.addTests(loader.loadTestsFromTestCase(cls))
+    return suite
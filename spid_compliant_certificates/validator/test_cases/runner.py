@@ -0,0 +1,124 @@
+# Copyright 2021 Paolo Smiraglia <paolo.smiraglia@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import argparse
+import pathlib
+import sys
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple, Type
+
+from spid_compliant_certificates.validator.test_cases.base import TestBase
+from spid_compliant_certificates.validator.test_cases.fleet import (
+    TEST_CASES,
+    find_targets,
+    make_test_case,
+)
+
+
+class Outcome(NamedTuple):
+    target: str
+    tests_run: int
+    # (test name, message)
+    failures: Tuple[Tuple[str, str], ...]
+
+    def is_success(self) -> bool:
+        return not self.failures
+
+
+def _run_target(test_class: Type[TestBase], cert_file: str,
+                cert_index: int) -> Outcome:
+    cls = make_test_case(test_class, cert_file, cert_index)
+    suite = unittest.defaultTestLoader.loadTestsFromTestCase(cls)
+    result = unittest.TestResult()
+    suite.run(result)
+
+    failures = tuple(
+        (test._testMethodName, tb.strip().splitlines()[-1])
+        for test, tb in result.failures + result.errors
+    )
+    target = f'{cert_file}#{cert_index}' if cert_index else cert_file
+    return Outcome(target, result.testsRun, failures)
+
+
+def run_parallel(test_class: Type[TestBase],
+                 crt_files: Iterable[pathlib.Path],
+                 workers: Optional[int] = None,
+                 chunk_size: int = 16) -> Iterator[Outcome]:
+    targets = find_targets(crt_files)
+    paths = [t[0] for t in targets]
+    indexes = [t[1] for t in targets]
+
+    # no need to pay for a process pool
+    if workers == 1 or len(targets) < 2:
+        yield from map(_run_target, repeat(test_class), paths, indexes)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(_run_target, repeat(test_class), paths,
+                                indexes, chunksize=max(1, chunk_size))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description='Run the sector test cases over many certificates'
+    )
+    parser.add_argument('crt_files', nargs='*', type=pathlib.Path,
+                        help='certificates or bundles to be tested')
+    parser.add_argument('--crt-dir', type=pathlib.Path,
+                        help='directory whose certificates will be tested')
+    parser.add_argument('--crt-glob', default='*.pem',
+                        help='pattern used to select the certificates')
+    parser.add_argument('--sector', choices=list(TEST_CASES),
+                        default='public')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='number of worker processes')
+    parser.add_argument('--chunk-size', type=int, default=16)
+    parser.add_argument('-v', '--verbose', action='store_true')
+    args = parser.parse_args(argv)
+
+    crt_files = list(args.crt_files)
+    if args.crt_dir is not None:
+        crt_files += sorted(p for p in args.crt_dir.glob(args.crt_glob)
+                            if p.is_file())
+    if not crt_files:
+        parser.error('no certificate to be tested')
+
+    total = failed = tests = 0
+    for o in run_parallel(TEST_CASES[args.sector], crt_files, args.workers,
+                          args.chunk_size):
+        total += 1
+        tests += o.tests_run
+        if not o.is_success():
+            failed += 1
+            print(f'FAIL {o.target}')
+            for name, msg in o.failures:
+                print(f'  {name}: {msg}')
+        elif args.verbose:
+            print(f'ok   {o.target}')
+
+    print(f'Ran {tests} tests on {total} certificates, '
+          + f'{failed} certificates failed')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -18,9 +18,34 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-import base64
+import binascii
+import mmap
 import os
-from typing import Tuple
+import re
+from typing import Iterator, Tuple
+
+PEM_CERT_RE = re.compile(
+    rb'-----BEGIN CERTIFICATE-----(.+?)-----END CERTIFICATE-----',
+    re.DOTALL
+)
+
+
+def _iter_der(buf) -> Iterator[bytes]:
+    # buf is anything exposing the buffer protocol (bytes, mmap, ...)
+    with memoryview(buf) as view:
+        for m in PEM_CERT_RE.finditer(buf):
+            # a2b_base64 skips the line breaks, no need to split lines
+            with view[m.start(1):m.end(1)] as b64_data:
+                yield binascii.a2b_base64(b64_data)
+
+
+def iter_der(cert_file: str) -> Iterator[bytes]:
+    with open(cert_file, 'rb') as fp:
+        # mmap refuses empty files
+        if os.fstat(fp.fileno()).st_size == 0:
+            return
+        with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield from _iter_der(mm)
 
 
 def pem_to_der(cert_file: str) -> Tuple[bytes, str]:
@@ -28,20 +53,9 @@ def pem_to_der(cert_file: str) -> Tuple[bytes, str]:
         msg = f'File at {cert_file} not found'
         return None, msg
 
-    lines = []
-    with open(cert_file, 'r') as fp:
-        lines = fp.readlines()
-        fp.close()
-
-    if ('-----BEGIN CERTIFICATE-----' not in lines[0]):
+    der = next(iter_der(cert_file), None)
+    if der is None:
         msg = f'Certificate at {cert_file} must be a PEM'
         return None, msg
 
-    if ('-----END CERTIFICATE-----' not in lines[len(lines)-1]):
-        msg = f'Certificate at {cert_file} must be a PEM'
-        return None, msg
-
-    b64_data = ''.join([line[:-1] for line in lines[1:-1]])
-    der = base64.b64decode(b64_data)
-
     return der, None
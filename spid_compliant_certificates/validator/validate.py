@@ -18,23 +18,44 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-from typing import List, Tuple
+from datetime import datetime
+from typing import Any, List, Optional, Tuple, Union
 
 from cryptography import x509
-
-from spid_compliant_certificates.validator import checks
-from spid_compliant_certificates.validator.report import Check, Report, Test
-from spid_compliant_certificates.validator.utils import pem_to_der
+from cryptography.hazmat.primitives import hashes
+
+from spid_compliant_certificates.validator.cache import ReportCache, expiry_for
+from spid_compliant_certificates.validator.certificate import ParsedCertificate
+from spid_compliant_certificates.validator.hooks import ValidationHooks
+from spid_compliant_certificates.validator.plan import Step, compile_plan
+from spid_compliant_certificates.validator.report import (
+    FAILURE,
+    Check,
+    Report,
+    Test,
+)
+from spid_compliant_certificates.validator.utils import _iter_der, pem_to_der
+
+
+def _add_checks(t: Test, checks: List[Tuple[bool, str, Any]]) -> Test:
+    for i, (res, msg, val) in enumerate(checks):
+        c = Check(msg, bool(res), val)
+        if c.id is None and t.id is not None:
+            # plain string messages get a positional id
+            c.id = f'{t.id}.{i}'
+        t.add_check(c)
+    return t
 
 
-def _do_check(checks: List[Tuple[bool, str]], base_msg: str) -> Test:
-    t = Test(base_msg)
-    for res, msg, val in checks:
-        t.add_check(Check(msg, 'success' if res else 'failure', val))
-    return t
+def _do_check(checks: List[Tuple[bool, str, Any]], base_msg: str,
+              test_id: Optional[str] = None) -> Test:
+    return _add_checks(Test(base_msg, test_id), checks)
 
 
-def validate(crt_file: str, sector: str) -> Report:
+def validate(crt_file: str, sector: str,
+             cache: Optional[ReportCache] = None,
+             hooks: Optional[ValidationHooks] = None,
+             fail_fast: bool = False) -> Report:
     # load certificate file
     crt = None
     der, msg = pem_to_der(crt_file)
@@ -43,54 +64,119 @@ def validate(crt_file: str, sector: str) -> Report:
     else:
         raise Exception(msg)
 
-    rep = Report(str(crt_file.absolute()))
-
-    # check key type and size
-    rep.add_test(_do_check(
-        checks.key_type_and_size(crt),
-        'Checking the key type and size'
-    ))
-
-    # check digest algorithm
-    rep.add_test(_do_check(
-        checks.digest_algorithm(crt.signature_hash_algorithm.name),
-        'Checking the signature digest algorithm'
-    ))
-
-    # check SubjectDN
-    rep.add_test(_do_check(
-        checks.subject_dn(crt.subject, sector),
-        'Checking the SubjectDN'
-    ))
-
-    # check time 
-    rep.add_test(_do_check(
-        checks.not_expired(crt),
-        'Checking that the certificates is not expired'
-    ))
-
-    # check basicConstraints
-    _ext_msg = 'Checking basicConstraints x509 extension'
-    try:
-        rep.add_test(_do_check(
-            checks.basic_constraints(crt.extensions),
-            _ext_msg
-        ))
-
-        # check keyUsage
-        rep.add_test(_do_check(
-            checks.key_usage(crt.extensions),
-            'Checking keyUsage x509 extension'
-        ))
-        # check certificatePolicies
-        rep.add_test(_do_check(
-            checks.certificate_policies(crt.extensions, sector),
-            'Checking certificatePolicies x509 extension'
-        ))
-
-    except ValueError as e:
-        test = Test(f"Critical Error on parsing extensions: {e}")
-        test.add_check(Check(f"{_ext_msg} critical error", 'failure', False))
-        rep.add_test(test)
+    return _validate(crt, str(crt_file.absolute()), sector, cache, hooks,
+                     fail_fast)
+
+
+def load_certificate(data: bytes) -> x509.Certificate:
+    # PEM (the first certificate, if a bundle) or DER
+    if b'-----BEGIN CERTIFICATE-----' in data:
+        der = next(_iter_der(data), None)
+        if der is None:
+            emsg = 'Certificate must be a PEM'
+            raise ValueError(emsg)
+    else:
+        der = data
+    return x509.load_der_x509_certificate(der)
+
+
+def validate_certificate(crt: x509.Certificate, sector: str,
+                         target: str = 'certificate',
+                         cache: Optional[ReportCache] = None,
+                         hooks: Optional[ValidationHooks] = None,
+                         fail_fast: bool = False) -> Report:
+    return _validate(crt, target, sector, cache, hooks, fail_fast)
+
+
+def validate_bytes(data: Union[bytes, x509.Certificate], sector: str,
+                   target: str = 'bytes',
+                   cache: Optional[ReportCache] = None,
+                   hooks: Optional[ValidationHooks] = None,
+                   fail_fast: bool = False) -> Report:
+    if isinstance(data, x509.Certificate):
+        crt = data
+    else:
+        crt = load_certificate(bytes(data))
+    return _validate(crt, target, sector, cache, hooks, fail_fast)
+
+
+def _validate(crt: x509.Certificate, target: str, sector: str,
+              cache: Optional[ReportCache] = None,
+              hooks: Optional[ValidationHooks] = None,
+              fail_fast: bool = False) -> Report:
+    fingerprint = crt.fingerprint(hashes.SHA256()).hex()
+
+    if cache is not None:
+        rep = cache.get(fingerprint, sector)
+        if rep is not None:
+            # served now, no test ran: the report hooks see it, the test
+            # hooks do not, and the stored timings are dropped
+            rep.target = target
+            rep.timestamp = datetime.now()
+            for t in rep.tests:
+                t.timing = None
+            if hooks is not None:
+                hooks.pre_report(rep)
+                hooks.post_report(rep)
+            return rep
+
+    rep = Report(target, fingerprint)
+    if hooks is not None:
+        hooks.pre_report(rep)
+
+    rep = _run_checks(crt, rep, sector, hooks, fail_fast)
+
+    if hooks is not None:
+        hooks.post_report(rep)
+
+    # a fail-fast failure may miss some tests, it must not be served to
+    # callers asking for the full report
+    if cache is not None and not (fail_fast and rep.failures):
+        cache.put(rep, sector, expiry_for(crt.not_valid_after))
+
+    return rep
+
+
+def _run_test(step: Step, pc: ParsedCertificate,
+              hooks: ValidationHooks) -> Test:
+    # same as _do_check(), but the hooks see the rule run: a rule
+    # computes all its checks at once, so there are no per-check hooks
+    test = Test(step.description, step.name)
+    hooks.pre_test(test)
+    _add_checks(test, step.run(pc))
+    hooks.post_test(test)
+    return test
+
+
+def _run_checks(crt: x509.Certificate, rep: Report, sector: str,
+                hooks: Optional[ValidationHooks] = None,
+                fail_fast: bool = False) -> Report:
+    plan = compile_plan(sector)
+
+    # parse once, every check reads from here
+    pc = ParsedCertificate(crt)
+
+    for step in plan.steps:
+        if step.extension and pc.extensions_error is not None:
+            e = pc.extensions_error
+            _ext_msg = step.description
+            test = Test(f"Critical Error on parsing extensions: {e}",
+                        'extensions')
+            test.add_check(
+                Check(f"{_ext_msg} critical error", FAILURE, False,
+                      'extensions.parsing')
+            )
+            rep.add_test(test)
+            break
+
+        if hooks is not None:
+            rep.add_test(_run_test(step, pc, hooks))
+        else:
+            rep.add_test(_do_check(step.run(pc), step.description,
+                                   step.name))
+
+        # the plan runs cheapest first, stop at the first failed test
+        if fail_fast and rep.failures:
+            break
 
     return rep
@@ -0,0 +1,224 @@
+# Copyright 2021 Paolo Smiraglia <paolo.smiraglia@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import pathlib
+import stat
+import time
+from itertools import repeat
+from typing import Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes
+
+from spid_compliant_certificates.validator.batch import (
+    _get_executor,
+    _get_worker_cache,
+    _load_failure,
+)
+from spid_compliant_certificates.validator.cache import ReportCache
+from spid_compliant_certificates.validator.report import Report
+from spid_compliant_certificates.validator.utils import iter_der
+from spid_compliant_certificates.validator.validate import _validate
+
+
+class Entry(NamedTuple):
+    mtime_ns: int
+    size: int
+    fingerprints: Tuple[str, ...]
+    reports: Tuple[Report, ...]
+    # earliest notAfter in the file, the results can flip at that time
+    expires: Optional[float]
+    checked: float
+
+
+class Change(NamedTuple):
+    # added, removed, changed (new content) or flipped (same content)
+    kind: str
+    target: str
+    old: Optional[str]
+    new: Optional[str]
+    # ids of the checks that started failing / stopped failing
+    failed: Tuple[str, ...]
+    fixed: Tuple[str, ...]
+
+
+def _failed_ids(rep: Optional[Report]) -> Set[str]:
+    if rep is None:
+        return set()
+    return {c.id for t in rep.tests for c in t.checks if not c.is_success()}
+
+
+def _index_file(crt_file: pathlib.Path, sector: str,
+                cache: Optional[ReportCache] = None) -> Optional[Entry]:
+    # None if the file vanished since the scan found it
+    checked = time.time()
+    target = str(crt_file.absolute())
+    fingerprints, reports, expires = [], [], None
+    # an unreadable file is retried at the next scan
+    mtime_ns = size = -1
+    try:
+        st = crt_file.stat()
+        mtime_ns, size = st.st_mtime_ns, st.st_size
+        for i, der in enumerate(iter_der(crt_file)):
+            _target = f'{target}#{i}' if i else target
+            try:
+                crt = x509.load_der_x509_certificate(der)
+            except Exception as e:
+                reports.append(_load_failure(_target, e))
+                continue
+            fingerprints.append(crt.fingerprint(hashes.SHA256()).hex())
+            reports.append(_validate(crt, _target, sector, cache))
+            # naive, as checks.not_expired compares it with the local
+            # time, so the result flips at this timestamp
+            not_after = crt.not_valid_after.timestamp()
+            expires = not_after if expires is None else min(expires,
+                                                            not_after)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        reports.append(_load_failure(target, e))
+
+    if not reports:
+        emsg = f'Certificate at {crt_file} must be a PEM'
+        reports.append(_load_failure(target, Exception(emsg)))
+
+    return Entry(mtime_ns, size, tuple(fingerprints), tuple(reports),
+                 expires, checked)
+
+
+def _index_in_worker(crt_file: pathlib.Path, sector: str) -> Optional[Entry]:  # noqa
+    return _index_file(crt_file, sector, _get_worker_cache())
+
+
+class DirectoryWatcher(object):
+    # unchanged files cost a stat() per scan, only new or modified files
+    # (and files holding a certificate that has just expired) are
+    # validated again
+    def __init__(self, crt_dir: pathlib.Path, sector: str,
+                 pattern: str = '*.pem', workers: Optional[int] = 1,
+                 cache: Optional[ReportCache] = None):
+        self.crt_dir = pathlib.Path(crt_dir)
+        if not self.crt_dir.is_dir():
+            emsg = f'Directory {crt_dir} not found'
+            raise ValueError(emsg)
+        self.sector = sector
+        self.pattern = pattern
+        self.workers = workers
+        self.cache = cache
+        self.index: Dict[pathlib.Path, Entry] = {}
+        # kept across scans, the worker caches stay warm
+        self._executor = None
+
+    def _stale(self, now: float) -> Tuple[List[pathlib.Path], Set[pathlib.Path]]:  # noqa
+        # the files to validate again and all the files found
+        stale, found = [], set()
+        for path in self.crt_dir.glob(self.pattern):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                # removed in the meantime
+                continue
+            if not stat.S_ISREG(st.st_mode):
+                continue
+            found.add(path)
+            e = self.index.get(path)
+            if (e is None or e.mtime_ns != st.st_mtime_ns
+                    or e.size != st.st_size
+                    or (e.expires is not None
+                        and e.checked < e.expires <= now)):
+                stale.append(path)
+        return stale, found
+
+    def _reindex(self, paths: List[pathlib.Path]) -> List[Optional[Entry]]:  # noqa
+        if self.workers == 1 or len(paths) < 2:
+            return [_index_file(p, self.sector, self.cache) for p in paths]
+        if self._executor is None:
+            self._executor = _get_executor(self.workers, self.cache)
+        return list(self._executor.map(_index_in_worker, paths,
+                                       repeat(self.sector), chunksize=16))
+
+    def _diff(self, old: Optional[Entry], new: Optional[Entry]) -> List[Change]:  # noqa
+        old_reps = {r.target: r for r in old.reports} if old else {}
+        new_reps = {r.target: r for r in new.reports} if new else {}
+        same_content = (old is not None and new is not None
+                        and old.fingerprints == new.fingerprints)
+
+        changes = []
+        for target in sorted(old_reps.keys() | new_reps.keys()):
+            o, n = old_reps.get(target), new_reps.get(target)
+            if o is None:
+                kind = 'added'
+            elif n is None:
+                kind = 'removed'
+            elif o.result == n.result:
+                # nothing worth reporting
+                continue
+            else:
+                kind = 'flipped' if same_content else 'changed'
+            failed, before = _failed_ids(n), _failed_ids(o)
+            if n is None:
+                # a removed certificate fixes nothing
+                failed = before = set()
+            changes.append(Change(
+                kind, target,
+                None if o is None else o.result,
+                None if n is None else n.result,
+                tuple(sorted(failed - before)),
+                tuple(sorted(before - failed)),
+            ))
+        return changes
+
+    def scan(self) -> List[Change]:
+        changes = []
+        stale, found = self._stale(time.time())
+        for path, entry in zip(stale, self._reindex(stale)):
+            if entry is None:
+                # gone in the meantime, dropped below
+                found.discard(path)
+                continue
+            changes.extend(self._diff(self.index.get(path), entry))
+            self.index[path] = entry
+
+        # files which are gone
+        for path in [p for p in self.index if p not in found]:
+            changes.extend(self._diff(self.index.pop(path), None))
+
+        return changes
+
+    def reports(self) -> List[Report]:
+        return [r for p in sorted(self.index) for r in self.index[p].reports]
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self) -> 'DirectoryWatcher':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def watch(self, callback: Callable[[Change], None],
+              interval: float = 5.0) -> None:
+        while True:
+            for change in self.scan():
+                callback(change)
+            time.sleep(interval)
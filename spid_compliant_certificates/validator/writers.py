@@ -0,0 +1,169 @@
+# Copyright 2021 Paolo Smiraglia <paolo.smiraglia@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import io
+import json
+import xml.etree.ElementTree as ET
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import BinaryIO, Dict
+
+from spid_compliant_certificates.validator.report import (
+    Report,
+    ReportSerializer,
+)
+
+
+class ReportWriter(ABC):
+    def __init__(self, fp: BinaryIO):
+        if isinstance(fp, io.RawIOBase):
+            fp = io.BufferedWriter(fp)
+        self.fp = fp
+        self.timestamp = datetime.now().strftime('%c')
+        self.result = 'success'
+        self.failures = 0
+        self.total = 0
+
+    def __enter__(self) -> 'ReportWriter':
+        self.open()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def summary(self) -> Dict:
+        d = {}
+        for k in ['result', 'timestamp', 'failures', 'total']:
+            d[k] = getattr(self, k)
+        return d
+
+    def open(self) -> None:
+        pass
+
+    def write(self, report: Report) -> None:
+        if not report.is_success():
+            self.result = 'failure'
+            self.failures += 1
+        self.total += 1
+        self._write(report)
+
+    @abstractmethod
+    def _write(self, report: Report) -> None:
+        pass
+
+    def close(self) -> None:
+        self.fp.flush()
+
+
+class JsonLinesWriter(ReportWriter):
+    def _write(self, report: Report) -> None:
+        self.fp.write(json.dumps(report.as_dict(), default=str).encode())
+        self.fp.write(b'\n')
+
+
+class JsonWriter(ReportWriter):
+    # the summary is known only at the end, so it follows the reports
+    def open(self) -> None:
+        self.fp.write(b'{"reports": [')
+
+    def _write(self, report: Report) -> None:
+        if self.total > 1:
+            self.fp.write(b', ')
+        self.fp.write(json.dumps(report.as_dict(), default=str).encode())
+
+    def close(self) -> None:
+        self.fp.write(b'], ')
+        self.fp.write(json.dumps(self.summary())[1:].encode())
+        super().close()
+
+
+class XmlWriter(ReportWriter):
+    def open(self) -> None:
+        self.fp.write(b"<?xml version='1.0' encoding='utf-8'?>\n")
+        self.fp.write(b'<batch><reports>')
+
+    def _write(self, report: Report) -> None:
+        ET.ElementTree(report.as_xml()).write(self.fp, encoding='utf-8',
+                                              xml_declaration=False)
+
+    def close(self) -> None:
+        self.fp.write(b'</reports>')
+        for k, v in self.summary().items():
+            se = ET.Element(k)
+            se.text = str(v)
+            ET.ElementTree(se).write(self.fp, encoding='utf-8',
+                                     xml_declaration=False)
+        self.fp.write(b'</batch>\n')
+        super().close()
+
+
+class YamlWriter(ReportWriter):
+    # one document per report, the summary is the last one
+    def __init__(self, fp: BinaryIO):
+        super().__init__(fp)
+        self._rs = ReportSerializer()
+
+    def _dump(self, d: Dict) -> None:
+        self.fp.write(b'---\n')
+        self.fp.write(self._rs._yml_dump(d).encode())
+
+    def _write(self, report: Report) -> None:
+        self._dump(report.as_dict())
+
+    def close(self) -> None:
+        self._dump(self.summary())
+        super().close()
+
+
+class TxtWriter(ReportWriter):
+    def __init__(self, fp: BinaryIO):
+        super().__init__(fp)
+        self._rs = ReportSerializer()
+
+    def _write(self, report: Report) -> None:
+        self.fp.write(self._rs.serialize(report, 'txt').encode())
+        self.fp.write(b'\n\n')
+
+    def close(self) -> None:
+        lines = []
+        lines.append(f'Result: {self.result}')
+        lines.append(f'Timestamp: {self.timestamp}')
+        lines.append(f'Total: {self.total}')
+        lines.append(f'Failures: {self.failures}')
+        self.fp.write('\n'.join(lines).encode())
+        self.fp.write(b'\n')
+        super().close()
+
+
+WRITERS = {
+    'json': JsonWriter,
+    'jsonl': JsonLinesWriter,
+    'txt': TxtWriter,
+    'xml': XmlWriter,
+    'yml': YamlWriter,
+    'yaml': YamlWriter,
+}
+
+
+def get_writer(format: str, fp: BinaryIO) -> ReportWriter:
+    if format not in WRITERS:
+        emsg = f'Format {format} is not accepted'
+        raise ValueError(emsg)
+    return WRITERS[format](fp)
@@ -0,0 +1,54 @@
+# Copyright 2021 Paolo Smiraglia <paolo.smiraglia@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import pathlib
+
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from spid_compliant_certificates.generator.generate import Builder, _write_pem
+
+# shared by the tests and the benchmarks
+CERT_OPTS = {
+    'private': {
+        'common_name': 'A.C.M.E',
+        'days': 365,
+        'entity_id': 'https://spid.acme.it',
+        'locality_name': 'Roma',
+        'org_id': 'VATIT-12345678901',
+        'org_name': 'A Company Making Everything',
+        'sector': 'private',
+    },
+    'public': {
+        'common_name': 'A.C.M.E',
+        'days': 365,
+        'entity_id': 'https://spid.acme.it',
+        'locality_name': 'Roma',
+        'org_id': 'PA:IT-c_h501',
+        'org_name': 'A Company Making Everything',
+        'sector': 'public',
+    },
+}
+
+
+def self_signed(tmp: pathlib.Path, sector: str) -> pathlib.Path:
+    # no validate_arguments(): fixtures must not hit the IPA API
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    crt_out = tmp / f'{sector}.pem'
+    _write_pem(Builder(key, CERT_OPTS[sector]).crt(), crt_out)
+    return crt_out
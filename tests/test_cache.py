@@ -0,0 +1,96 @@
+# Copyright 2021 Paolo Smiraglia <paolo.smiraglia@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from itertools import repeat
+
+from spid_compliant_certificates.validator.aio import AsyncValidator
+from spid_compliant_certificates.validator.batch import (
+    _get_executor,
+    _get_worker_cache,
+    _validate_in_worker,
+    find_certificates,
+    iter_validate_many,
+)
+from spid_compliant_certificates.validator.cache import ReportCache
+
+
+def _worker_cache_size() -> int:
+    return len(_get_worker_cache())
+
+
+def test_cache_shared_by_threads(tmp_path, crt_files):
+    cache = ReportCache(tmp_path / 'cache.sqlite')
+    data = crt_files['private'].read_bytes()
+
+    async def _run():
+        with ThreadPoolExecutor(4) as executor:
+            v = AsyncValidator(executor, cache=cache)
+            return await asyncio.gather(*[
+                v.validate(data, 'private') for _ in range(18)
+            ])
+
+    reports = asyncio.run(_run())
+    assert all(r.is_success() for r in reports)
+    assert len(cache) == 1
+    cache.close()
+
+
+def test_cache_kept_by_async_workers(tmp_path, crt_files):
+    cache = ReportCache(tmp_path / 'cache.sqlite')
+    data = crt_files['private'].read_bytes()
+
+    async def _run(v):
+        return await asyncio.gather(*[
+            v.validate(data, 'private') for _ in range(6)
+        ])
+
+    with AsyncValidator(cache=cache, workers=1) as v:
+        reports = asyncio.run(_run(v))
+        # the worker cache was set up once, not sent along every task
+        assert v.executor.submit(_worker_cache_size).result() == 1
+    assert all(r.is_success() for r in reports)
+
+
+def test_cache_kept_by_workers(tmp_path, crt_dir):
+    cache = ReportCache(tmp_path / 'cache.sqlite')
+    crt_files = find_certificates(crt_dir)
+
+    with _get_executor(1, cache) as executor:
+        reports = [r for reps in executor.map(_validate_in_worker,
+                                              crt_files, repeat('private'))
+                   for r in reps]
+        # every task hit the same in-memory tier
+        assert executor.submit(_worker_cache_size).result() == 1
+    assert len(reports) == len(crt_files)
+    assert all(r.is_success() for r in reports)
+
+
+def test_cache_batch(tmp_path, crt_dir):
+    cache = ReportCache(tmp_path / 'cache.sqlite')
+    crt_files = find_certificates(crt_dir)
+    reports = list(iter_validate_many(crt_files, 'private', workers=2,
+                                      cache=cache))
+    assert len(reports) == len(crt_files)
+
+    # the workers stored the report, the parent reads it back
+    fingerprint = reports[0].fingerprint
+    assert cache.get(fingerprint, 'private').is_success()
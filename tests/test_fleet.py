@@ -0,0 +1,58 @@
+# Copyright 2021 Paolo Smiraglia <paolo.smiraglia@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import pathlib
+import unittest
+
+from spid_compliant_certificates.validator import test_cases
+from spid_compliant_certificates.validator.test_cases.fleet import (
+    find_targets,
+    make_test_case,
+)
+
+
+def test_find_targets(tmp_path, crt_files):
+    bundle = tmp_path / 'bundle.pem'
+    bundle.write_bytes(crt_files['private'].read_bytes() * 2)
+    missing = tmp_path / 'missing.pem'
+    assert find_targets([bundle, missing, tmp_path]) == [
+        (str(bundle), 0), (str(bundle), 1),
+        (str(missing), 0), (str(tmp_path), 0),
+    ]
+
+
+def test_missing_file_fails(tmp_path):
+    case = make_test_case(test_cases.TestPrivateSector,
+                          str(tmp_path / 'missing.pem'))
+    suite = unittest.defaultTestLoader.loadTestsFromTestCase(case)
+    result = unittest.TestResult()
+    suite.run(result)
+    assert not result.errors
+    assert result.failures and len(result.failures) == result.testsRun
+    assert 'not found' in result.failures[0][1]
+
+
+def test_valid_file_passes(crt_files):
+    case = make_test_case(test_cases.TestPrivateSector,
+                          str(pathlib.Path(crt_files['private'])))
+    suite = unittest.defaultTestLoader.loadTestsFromTestCase(case)
+    result = unittest.TestResult()
+    suite.run(result)
+    assert result.wasSuccessful()
@@ -0,0 +1,52 @@
+# Copyright 2021 Paolo Smiraglia <paolo.smiraglia@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import pytest
+from certs import CERT_OPTS
+
+from spid_compliant_certificates.generator.generate import (
+    generate,
+    generate_bytes,
+)
+from spid_compliant_certificates.validator.validate import validate
+
+
+@pytest.fixture
+def crypto_opts(tmp_path) -> dict:
+    return {
+        'key_size': 2048,
+        'key_out': tmp_path / 'key.pem',
+        'csr_out': tmp_path / 'csr.pem',
+        'crt_out': tmp_path / 'crt.pem',
+        'md_alg': 'sha256',
+    }
+
+
+def test_generate_private(crypto_opts):
+    # the validator (and make validate-private) read crt.pem
+    generate(CERT_OPTS['private'], crypto_opts)
+    for k in ['key_out', 'csr_out', 'crt_out']:
+        assert crypto_opts[k].is_file()
+    assert validate(crypto_opts['crt_out'], 'private').is_success()
+
+
+def test_generate_bytes_private():
+    g = generate_bytes(CERT_OPTS['private'], encoding='PEM')
+    assert g.crt.startswith(b'-----BEGIN CERTIFICATE-----')
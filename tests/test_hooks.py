@@ -0,0 +1,65 @@
+# Copyright 2021 Paolo Smiraglia <paolo.smiraglia@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from spid_compliant_certificates.validator.cache import ReportCache
+from spid_compliant_certificates.validator.hooks import (
+    Profiler,
+    ValidationHooks,
+)
+from spid_compliant_certificates.validator.validate import validate
+
+
+class _Recorder(ValidationHooks):
+    def __init__(self):
+        self.tests = []
+
+    def post_test(self, test):
+        self.tests.append(test)
+
+
+def test_hooks_see_report_tests(crt_files):
+    hooks = _Recorder()
+    rep = validate(crt_files['private'], 'private', hooks=hooks)
+    assert [id(t) for t in hooks.tests] == [id(t) for t in rep.tests]
+    assert all(t.checks for t in hooks.tests)
+
+
+def test_profiler_times_tests(crt_files):
+    profiler = Profiler()
+    rep = validate(crt_files['public'], 'public', hooks=profiler)
+    assert all(t.timing['wall'] >= 0 for t in rep.tests)
+    spans = [s for s in profiler.spans if s['cat'] == 'test']
+    assert len(spans) == len(rep.tests)
+
+
+def test_cached_report_is_fresh(crt_files):
+    # stored with the timings and the timestamp of its own run
+    first = validate(crt_files['public'], 'public', hooks=Profiler())
+    first.timestamp = 'then'
+    cache = ReportCache()
+    cache.put(first, 'public')
+
+    profiler = Profiler()
+    rep = validate(crt_files['public'], 'public', cache=cache,
+                   hooks=profiler)
+    # the report hooks run, no test ran so no timing is reported
+    assert [s['cat'] for s in profiler.spans] == ['report']
+    assert all(t.timing is None for t in rep.tests)
+    assert rep.timestamp != 'then'
@@ -0,0 +1,44 @@
+# Copyright 2021 Paolo Smiraglia <paolo.smiraglia@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import subprocess
+import sys
+
+
+def _imported_after(stmt: str) -> set:
+    code = f'import sys; {stmt}; print(" ".join(sys.modules))'
+    out = subprocess.run([sys.executable, '-c', code], check=True,
+                         capture_output=True, text=True).stdout
+    return set(out.split())
+
+
+def test_single_validation_skips_the_pool():
+    modules = _imported_after(
+        'from spid_compliant_certificates.validator import validate'
+    )
+    assert 'concurrent.futures' not in modules
+    assert 'multiprocessing' not in modules
+    assert 'spid_compliant_certificates.validator.batch' not in modules
+
+
+def test_validate_many_is_still_exported():
+    modules = _imported_after(
+        'from spid_compliant_certificates.validator import validate_many'
+    )
+    assert 'spid_compliant_certificates.validator.batch' in modules
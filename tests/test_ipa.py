@@ -0,0 +1,129 @@
+# Copyright 2021 Paolo Smiraglia <paolo.smiraglia@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from spid_compliant_certificates.generator.ipa import IPAClient
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        query = json.loads(self.rfile.read(
+            int(self.headers['content-length'])
+        ))
+        self.server.hits += 1
+
+        mode = self.server.mode
+        if mode == 'slow':
+            time.sleep(0.5)
+        if mode == 'bad-json':
+            body = b'<html>maintenance</html>'
+        elif mode == 'unexpected':
+            body = json.dumps({'risposta': None}).encode()
+        else:
+            entries = [{'codEnte': c} for c in self.server.codes
+                       if c == query['codEnte']]
+            body = json.dumps(
+                {'risposta': {'listaResponse': entries or None}}
+            ).encode()
+
+        self.send_response(200)
+        self.send_header('content-type', 'application/json')
+        self.send_header('content-length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    server.codes, server.mode, server.hits = {'c_h501'}, 'ok', 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.url = f'http://127.0.0.1:{server.server_port}/ricerca'
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_exists(stub):
+    client = IPAClient(stub.url)
+    assert client.exists('c_h501')
+    assert not client.exists('c_x999')
+
+
+def test_timeout(stub):
+    stub.mode = 'slow'
+    client = IPAClient(stub.url, timeout=0.1)
+    with pytest.raises(ValueError, match='Unable to check'):
+        client.exists('c_h501')
+
+
+@pytest.mark.parametrize('mode', ['bad-json', 'unexpected'])
+def test_bad_response(stub, mode):
+    stub.mode = mode
+    client = IPAClient(stub.url)
+    with pytest.raises(ValueError):
+        client.exists('c_h501')
+
+
+def test_cache_ttl(stub):
+    client = IPAClient(stub.url, ttl=3600)
+    assert client.exists('c_h501') and client.exists('c_h501')
+    assert stub.hits == 1
+
+    # missing codes are looked up every time
+    client.exists('c_x999')
+    client.exists('c_x999')
+    assert stub.hits == 3
+
+    client = IPAClient(stub.url, ttl=-1)
+    client.exists('c_h501')
+    client.exists('c_h501')
+    assert stub.hits == 5
+
+
+def test_cache_file(stub, tmp_path):
+    cache_file = tmp_path / 'ipa.json'
+    assert IPAClient(stub.url, cache_file=cache_file).exists('c_h501')
+    assert stub.hits == 1
+
+    # a new client, e.g. the next run, reads the codes back
+    stub.mode = 'bad-json'
+    assert IPAClient(stub.url, cache_file=cache_file).exists('c_h501')
+    assert stub.hits == 1
+
+
+@pytest.mark.parametrize('content', ['["c_h501"]', '"c_h501"', '42'])
+def test_cache_file_not_an_object(stub, tmp_path, content):
+    cache_file = tmp_path / 'ipa.json'
+    cache_file.write_text(content)
+    # treated as empty, then replaced
+    assert IPAClient(stub.url, cache_file=cache_file).exists('c_h501')
+    assert stub.hits == 1
+    assert 'c_h501' in json.loads(cache_file.read_text())
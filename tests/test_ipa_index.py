@@ -0,0 +1,39 @@
+# Copyright 2021 Paolo Smiraglia <paolo.smiraglia@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import pytest
+
+from spid_compliant_certificates.commons.ipa_index import import_dump
+
+
+def test_import_dump_cleans_up_on_error(tmp_path):
+    dump = tmp_path / 'enti.json'
+    # the second record breaks the import halfway
+    dump.write_text('[{"codice_ipa": "c_h501"}, 5]')
+    with pytest.raises(TypeError):
+        import_dump(dump, tmp_path / 'ipa.sqlite')
+    assert list(tmp_path.iterdir()) == [dump]
+
+
+def test_import_dump_cleans_up_when_empty(tmp_path):
+    dump = tmp_path / 'enti.csv'
+    dump.write_text('codice_ipa,denominazione_ente\n')
+    with pytest.raises(ValueError, match='No IPA code'):
+        import_dump(dump, tmp_path / 'ipa.sqlite')
+    assert list(tmp_path.iterdir()) == [dump]
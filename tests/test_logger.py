@@ -0,0 +1,63 @@
+# Copyright 2021 Paolo Smiraglia <paolo.smiraglia@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import io
+import json
+import logging
+import threading
+
+from spid_compliant_certificates.commons import logger
+
+
+class _Lazy(object):
+    def __init__(self):
+        self.threads = []
+
+    def __str__(self) -> str:
+        self.threads.append(threading.get_ident())
+        return 'lazy'
+
+
+def test_records_formatted_by_listener():
+    stream = io.StringIO()
+    logger.setup(logging.DEBUG, json_lines=True, stream=stream)
+    try:
+        lazy = _Lazy()
+        logger.LOG.info('value: %s', lazy, extra={'target': 'crt.pem'})
+    finally:
+        logger.shutdown()
+
+    d = json.loads(stream.getvalue())
+    assert d['message'] == 'value: lazy'
+    assert d['target'] == 'crt.pem'
+    assert lazy.threads and threading.get_ident() not in lazy.threads
+
+
+def test_quiet_keeps_summaries():
+    stream = io.StringIO()
+    logger.setup(logger.SUMMARY, json_lines=True, stream=stream)
+    try:
+        logger.LOG.info('detail')
+        logger.LOG.log(logger.SUMMARY, 'summary')
+    finally:
+        logger.shutdown()
+
+    lines = [json.loads(x) for x in stream.getvalue().splitlines()]
+    assert [x['message'] for x in lines] == ['summary']
@@ -0,0 +1,82 @@
+# Copyright 2021 Paolo Smiraglia <paolo.smiraglia@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import pytest
+from certs import CERT_OPTS
+
+from spid_compliant_certificates.generator.manifest import (
+    iter_generate_many,
+    load_manifest,
+)
+
+ENTITY = CERT_OPTS['private']
+
+
+def _manifest(tmp_path, *names):
+    lines = [','.join(['name'] + list(ENTITY))]
+    for n in names:
+        lines.append(','.join([n] + [str(v) for v in ENTITY.values()]))
+    manifest = tmp_path / 'entities.csv'
+    manifest.write_text('\n'.join(lines))
+    return manifest
+
+
+@pytest.mark.parametrize('name', ['.', '..'])
+def test_load_manifest_rejects_dot_names(tmp_path, name):
+    with pytest.raises(ValueError, match='invalid name'):
+        load_manifest(_manifest(tmp_path, name))
+
+
+def test_load_manifest_rejects_non_mapping_rows(tmp_path):
+    manifest = tmp_path / 'entities.yml'
+    manifest.write_text('- foo\n')
+    with pytest.raises(ValueError, match='#1 .* must be a mapping'):
+        load_manifest(manifest)
+
+
+def test_generate_many_stays_in_out_dir(tmp_path):
+    entity = dict(ENTITY, name='..', key_size=2048, md_alg='sha256')
+    with pytest.raises(ValueError, match='Invalid entity name'):
+        list(iter_generate_many([entity], tmp_path / 'out', workers=1))
+    assert not (tmp_path / 'crt.pem').exists()
+
+
+class CountingIndex(object):
+    def __init__(self):
+        self.lookups = []
+
+    def exists(self, ipa_code):
+        self.lookups.append(ipa_code)
+        return ipa_code == 'c_h501'
+
+
+def test_generate_many_checks_ipa_codes_in_parent(tmp_path):
+    ipa = CountingIndex()
+    entities = [
+        dict(ENTITY, name=f'pa{i}', key_size=2048, md_alg='sha256',
+             sector='public', org_id=f'PA:IT-{code}')
+        for i, code in enumerate(['c_h501', 'c_h501', 'nope'])
+    ]
+    results = {r.name: r for r in iter_generate_many(entities, tmp_path,
+                                                     workers=2, ipa=ipa)}
+    # lookups happen once per entity, here rather than in the workers
+    assert ipa.lookups == ['c_h501', 'c_h501', 'nope']
+    assert results['pa0'].error is None and results['pa1'].error is None
+    assert 'does not exist' in results['pa2'].error
+    assert not (tmp_path / 'pa2').exists()
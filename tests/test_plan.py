@@ -0,0 +1,101 @@
+# Copyright 2021 Paolo Smiraglia <paolo.smiraglia@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from spid_compliant_certificates.commons.ipa_index import IPAIndex, import_dump
+from spid_compliant_certificates.validator.batch import (
+    _init_worker,
+    _validate_in_worker,
+)
+from spid_compliant_certificates.validator.cache import ReportCache
+from spid_compliant_certificates.validator.plan import (
+    compile_plan,
+    get_ipa_index,
+    ruleset_version,
+    use_ipa_index,
+)
+from spid_compliant_certificates.validator.validate import validate
+
+
+def _index(tmp_path, name: str, codes: str) -> IPAIndex:
+    dump = tmp_path / f'{name}.csv'
+    dump.write_text('codice_ipa,denominazione_ente\n' + codes)
+    import_dump(dump, tmp_path / f'{name}.sqlite')
+    return IPAIndex(tmp_path / f'{name}.sqlite')
+
+
+@pytest.fixture
+def indexes(tmp_path):
+    yield (_index(tmp_path, 'with', 'c_h501,Roma Capitale\n'),
+           _index(tmp_path, 'without', 'c_f205,Milano\n'))
+    use_ipa_index(None)
+
+
+def _steps(sector: str) -> list:
+    return [s.name for s in compile_plan(sector).steps]
+
+
+def test_use_ipa_index_replaces(indexes):
+    use_ipa_index(indexes[0])
+    use_ipa_index(indexes[1])
+    assert get_ipa_index() is indexes[1]
+    assert _steps('public').count('ipa_code') == 1
+    assert 'ipa_code' not in _steps('private')
+
+    use_ipa_index(None)
+    assert 'ipa_code' not in _steps('public')
+
+
+def test_spawned_workers_get_the_index(indexes, crt_files):
+    ctx = multiprocessing.get_context('spawn')
+    for index, success in zip(indexes, [True, False]):
+        use_ipa_index(index)
+        with ProcessPoolExecutor(1, mp_context=ctx, initializer=_init_worker,
+                                 initargs=(None, get_ipa_index())) as ex:
+            assert 'ipa_code' in ex.submit(_steps, 'public').result()
+            rep, = ex.submit(_validate_in_worker, crt_files['public'],
+                             'public').result()
+        assert rep.is_success() is success
+
+
+def test_ruleset_version_follows_the_index(indexes, tmp_path):
+    use_ipa_index(indexes[0])
+    with_version = ruleset_version()
+    use_ipa_index(indexes[1])
+    assert ruleset_version() != with_version
+
+    # a new dump in the same index file is a new ruleset as well
+    dump = tmp_path / 'with.csv'
+    dump.write_text('codice_ipa,denominazione_ente\nc_f205,Milano\n')
+    import_dump(dump, indexes[0].index_file)
+    use_ipa_index(IPAIndex(indexes[0].index_file))
+    assert ruleset_version() != with_version
+
+
+def test_cache_misses_after_switching_index(indexes, crt_files):
+    cache = ReportCache()
+    for index, success in zip(indexes, [True, False]):
+        use_ipa_index(index)
+        rep = validate(crt_files['public'], 'public', cache=cache)
+        assert rep.is_success() is success
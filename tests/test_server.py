@@ -0,0 +1,76 @@
+# Copyright 2021 Paolo Smiraglia <paolo.smiraglia@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import asyncio
+import json
+
+import pytest
+
+from spid_compliant_certificates.validator.server import ValidationServer
+
+
+async def _post(unix_socket: str, target: str, body: bytes) -> tuple:
+    reader, writer = await asyncio.open_unix_connection(unix_socket)
+    writer.write((f'POST {target} HTTP/1.1\r\n'
+                  + f'Content-Length: {len(body)}\r\n\r\n').encode() + body)
+    await writer.drain()
+    data = await reader.read()
+    writer.close()
+    head, _, out = data.partition(b'\r\n\r\n')
+    lines = head.decode().split('\r\n')
+    headers = dict(line.split(': ', 1) for line in lines[1:])
+    return int(lines[0].split()[1]), headers['Content-Type'], out.decode()
+
+
+def _request(tmp_path, target: str, body: bytes) -> tuple:
+    unix_socket = str(tmp_path / 'server.sock')
+
+    async def _run():
+        server = ValidationServer(workers=1)
+        task = asyncio.create_task(server.serve(unix_socket=unix_socket))
+        try:
+            for _ in range(100):
+                if (tmp_path / 'server.sock').exists():
+                    break
+                await asyncio.sleep(0.05)
+            return await _post(unix_socket, target, body)
+        finally:
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+    return asyncio.run(_run())
+
+
+def test_validate_jsonl(tmp_path, crt_files):
+    status, ctype, out = _request(
+        tmp_path, '/validate?sector=private&format=jsonl',
+        crt_files['private'].read_bytes()
+    )
+    assert status == 200
+    assert ctype == 'application/x-ndjson'
+    lines = out.splitlines()
+    assert lines and all(json.loads(line) for line in lines)
+
+
+def test_unknown_format(tmp_path, crt_files):
+    status, _, _ = _request(tmp_path, '/validate?format=csv',
+                            crt_files['private'].read_bytes())
+    assert status == 400
@@ -0,0 +1,72 @@
+# Copyright 2021 Paolo Smiraglia <paolo.smiraglia@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import pathlib
+
+from cryptography import x509
+
+from spid_compliant_certificates.validator.watch import (
+    DirectoryWatcher,
+    _index_file,
+)
+
+
+def test_vanished_file(crt_dir):
+    watcher = DirectoryWatcher(crt_dir, 'private')
+    assert len(watcher.scan()) == 6
+
+    # deleted between the stat() of the scan and the reindex
+    gone = crt_dir / 'crt0.pem'
+    gone.unlink()
+    assert _index_file(gone, 'private') is None
+    watcher._stale = lambda now: ([gone], set(watcher.index))
+    changes = watcher.scan()
+    assert [(c.kind, c.target) for c in changes] == [
+        ('removed', str(gone.absolute()))
+    ]
+    assert gone not in watcher.index
+
+
+def test_expires_as_checked(crt_files):
+    crt = x509.load_pem_x509_certificate(crt_files['private'].read_bytes())
+    entry = _index_file(crt_files['private'], 'private')
+    # checks.not_expired compares the naive notAfter with the local time
+    assert entry.expires == crt.not_valid_after.timestamp()
+
+
+def test_unchanged_files_cost_one_stat(crt_dir, monkeypatch):
+    watcher = DirectoryWatcher(crt_dir, 'private')
+    watcher.scan()
+    (crt_dir / 'crt0.pem').unlink()
+
+    calls = []
+    path_stat = pathlib.Path.stat
+
+    def counting_stat(self, *args, **kwargs):
+        calls.append(self)
+        return path_stat(self, *args, **kwargs)
+
+    monkeypatch.setattr(pathlib.Path, 'stat', counting_stat)
+    changes = watcher.scan()
+    assert [c.kind for c in changes] == ['removed']
+    # glob() may stat the directory itself
+    assert sorted(p.name for p in calls if p != crt_dir) == [
+        f'crt{i}.pem' for i in range(1, 6)
+    ]